@@ -0,0 +1,24 @@
+import base64
+import logging
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+
+def decode_jwt(token: str) -> dict:
+    """Decode the JWT payload without verifying it (debug output and expiry checks)"""
+    try:
+        # Slice out the middle segment instead of splitting off the signature
+        start = token.find('.') + 1
+        end = token.find('.', start)
+        if start == 0 or end == -1 or token.find('.', end + 1) != -1:
+            return {}
+        
+        # JWT segments are unpadded base64url ('-' / '_' alphabet)
+        payload = token[start:end]
+        decoded = base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4))
+        return orjson.loads(decoded)
+    except Exception as e:
+        logger.warning("Could not decode token: %s", e)
+        return {}
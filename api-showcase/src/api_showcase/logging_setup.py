@@ -0,0 +1,38 @@
+import atexit
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from decouple import config
+
+LOG_FORMAT = "%(message)s"
+
+_listener: Optional[QueueListener] = None
+
+
+def setup_logging(level: Optional[str] = None) -> None:
+    """Send log records through a queue drained by a background thread.
+
+    Coroutines only enqueue the record; the blocking write to stdout happens on
+    the listener thread, so concurrent upload/delete tasks never wait on each
+    other's output. The level defaults to LOG_LEVEL (INFO). Safe to call twice.
+    """
+    global _listener
+    root = logging.getLogger()
+    root.setLevel((level or config("LOG_LEVEL", default="INFO")).upper())
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(log_queue))
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
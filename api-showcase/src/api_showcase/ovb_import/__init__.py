@@ -0,0 +1,61 @@
+import socket
+from typing import Optional
+
+import aiohttp
+from aiohappyeyeballs import AddrInfoType
+from decouple import config
+
+from ._ssl import get_ssl_context
+
+DEFAULT_SOCKET_BUFFER_BYTES = 1 << 20
+DNS_CACHE_TTL_SECONDS = 600
+
+_SESSION: Optional[aiohttp.ClientSession] = None
+
+
+def _socket_factory(addr_info: AddrInfoType) -> socket.socket:
+    """Create upload sockets with enlarged kernel buffers and Nagle disabled.
+
+    Large JSON imports otherwise trickle out in small send() calls that stall
+    on ACKs. OVB__SOCKET_BUFFER_BYTES=0 keeps the kernel's auto-tuned sizes.
+    """
+    family, type_, proto, _, _ = addr_info
+    sock = socket.socket(family=family, type=type_, proto=proto)
+    buffer_bytes = config("OVB__SOCKET_BUFFER_BYTES", default=DEFAULT_SOCKET_BUFFER_BYTES, cast=int)
+    if buffer_bytes > 0:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, buffer_bytes)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, buffer_bytes)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return sock
+
+
+async def get_session() -> aiohttp.ClientSession:
+    """Return the shared OVB session, creating it on first use.
+
+    Token, probe and upload requests all go through this session so the
+    TCP + TLS connections to the OVB hosts are pooled and reused. Host lookups
+    are cached for DNS_CACHE_TTL_SECONDS; OVB__IPV4_ONLY=true skips the AAAA
+    lookup and happy-eyeballs wait for v4-only hosts.
+    """
+    global _SESSION
+    if _SESSION is None or _SESSION.closed:
+        connector = aiohttp.TCPConnector(
+            ssl=get_ssl_context(),
+            limit=0,
+            limit_per_host=32,
+            use_dns_cache=True,
+            ttl_dns_cache=DNS_CACHE_TTL_SECONDS,
+            family=socket.AF_INET if config("OVB__IPV4_ONLY", default=False, cast=bool) else socket.AF_UNSPEC,
+            keepalive_timeout=75,
+            socket_factory=_socket_factory,
+        )
+        _SESSION = aiohttp.ClientSession(connector=connector)
+    return _SESSION
+
+
+async def close_session() -> None:
+    """Close the shared OVB session if it was opened."""
+    global _SESSION
+    if _SESSION is not None and not _SESSION.closed:
+        await _SESSION.close()
+    _SESSION = None
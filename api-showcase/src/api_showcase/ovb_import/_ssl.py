@@ -0,0 +1,24 @@
+import ssl
+from typing import Optional
+
+from decouple import config
+
+_SSL_CONTEXT: Optional[ssl.SSLContext] = None
+
+
+def get_ssl_context() -> ssl.SSLContext:
+    """Return the process-wide TLS context for OVB connections, building it on first use.
+
+    Sharing one context avoids reloading the CA store for every session and lets
+    reconnects resume TLS sessions. Verification stays off unless
+    OVB__VERIFY_SSL=true; OVB__CA_BUNDLE points at a CA file to trust instead of
+    the system store.
+    """
+    global _SSL_CONTEXT
+    if _SSL_CONTEXT is None:
+        ssl_context = ssl.create_default_context(cafile=config("OVB__CA_BUNDLE", default=None))
+        if not config("OVB__VERIFY_SSL", default=False, cast=bool):
+            ssl_context.check_hostname = False
+            ssl_context.verify_mode = ssl.CERT_NONE
+        _SSL_CONTEXT = ssl_context
+    return _SSL_CONTEXT
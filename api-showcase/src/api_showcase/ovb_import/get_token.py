@@ -1,7 +1,11 @@
 from decouple import config
-import asyncio
+import logging
 import aiohttp
-import ssl
+import orjson
+
+from . import close_session, get_session
+from ..event_loop import run
+from ..logging_setup import setup_logging
 
 TOKEN_URL = "https://sso-test.ovb.eu/auth/realms/ovb/protocol/openid-connect/token"
 CLIENT_ID = config("OVB__CLIENT_ID") 
@@ -9,6 +13,8 @@ CLIENT_SECRET = config("OVB__CLIENT_SECRET")
 SCOPE = config("OVB__SCOPE")
 GRANT_TYPE = config("OVB__GRANT_TYPE")
 
+logger = logging.getLogger(__name__)
+
 async def get_ovb_access_token(session: aiohttp.ClientSession) -> str:
     auth = aiohttp.BasicAuth(CLIENT_ID, CLIENT_SECRET)
     data = {
@@ -18,30 +24,26 @@ async def get_ovb_access_token(session: aiohttp.ClientSession) -> str:
     
     async with session.post(TOKEN_URL, data=data, auth=auth) as response:
         text = await response.text()
-        print(f"\nResponse Status: {response.status}")
-        print(f"Response: {text}")
+        logger.info("Response Status: %s", response.status)
+        logger.info("Response: %s", text)
         
         if response.status >= 400:
             raise RuntimeError(f"Token request failed: {response.status} {text}")
         
-        payload = await response.json()
+        payload = orjson.loads(text)
         return payload["access_token"]
 
 async def main():
-    ssl_context = ssl.create_default_context()
-    ssl_context.check_hostname = False
-    ssl_context.verify_mode = ssl.CERT_NONE
-    
-    connector = aiohttp.TCPConnector(ssl=ssl_context)
-    session = aiohttp.ClientSession(connector=connector)
+    setup_logging()
+    session = await get_session()
     
     try:
         token = await get_ovb_access_token(session)
-        print(f"\n✅ Success!")
-        print(f"Access Token: {token}")
-        print(f"Token length: {len(token)}")
+        logger.info("✅ Success!")
+        logger.info("Access Token: %s", token)
+        logger.info("Token length: %s", len(token))
     finally:
-        await session.close()
+        await close_session()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    run(main())
\ No newline at end of file
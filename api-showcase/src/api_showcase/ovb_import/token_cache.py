@@ -0,0 +1,34 @@
+import asyncio
+import time
+from typing import Optional, Tuple
+
+import aiohttp
+
+from ..jwt_payload import decode_jwt
+from .get_token import get_ovb_access_token
+
+REFRESH_SKEW_SECONDS = 60
+
+_cached_token: Optional[Tuple[str, float]] = None
+_lock = asyncio.Lock()
+
+
+async def get_cached_token(session: aiohttp.ClientSession, force_refresh: bool = False) -> str:
+    """Return the cached OVB access token, refreshing it shortly before it expires.
+
+    Callers that got a 401/403 pass force_refresh=True; concurrent callers are
+    coalesced so a burst of rejections triggers a single token request.
+    """
+    global _cached_token
+    seen = _cached_token
+    async with _lock:
+        if _cached_token is not None:
+            token, expires_at = _cached_token
+            refreshed_meanwhile = _cached_token is not seen
+            if (refreshed_meanwhile or not force_refresh) and expires_at - time.time() > REFRESH_SKEW_SECONDS:
+                return token
+
+        token = await get_ovb_access_token(session)
+        expires_at = decode_jwt(token).get("exp")
+        _cached_token = (token, float(expires_at) if expires_at else 0.0)
+        return token
@@ -1,40 +1,55 @@
 import asyncio
-import base64
-import json
-import ssl
+import itertools
+import logging
+import os
+import re
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Iterable, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 import aiohttp
+import orjson
 from decouple import config
 
-from .get_token import get_ovb_access_token
+from ..event_loop import run
+from . import close_session, get_session
+from ..logging_setup import setup_logging
+from ..jwt_payload import decode_jwt
+from .token_cache import get_cached_token
 
 DEFAULT_UPLOAD_URL = "https://api-lc-test.ovb.eu/api/v1/dataimport/jsonimport"
 DEFAULT_UPLOAD_DIRECTORY = "/Users/daniellanghann/src/api-showcase/api-showcase/src/api_showcase/ovb_import/upload_files"
 DEFAULT_SUMMARY_DIRECTORY = "/Users/daniellanghann/src/api-showcase/api-showcase/src/api_showcase/ovb_import/upload_summary"
 DEFAULT_UPLOAD_DELAY_SECONDS = 5.0
+DEFAULT_UPLOAD_CONCURRENCY = 4
+DEFAULT_UPLOAD_BATCH_SIZE = 1
+BATCH_REJECTED_STATUS = {400, 415}
+TOKEN_REJECTED_STATUS = {401, 403}
+# Answers to the first upload that mean no upload in the run can succeed
+ENDPOINT_UNUSABLE_STATUS = {401, 403, 404, 405}
 SUMMARY_FILE_TEMPLATE = "upload_summary_{timestamp}.json"
 
+logger = logging.getLogger(__name__)
+
+
+class UploadFailed(RuntimeError):
+    """Raised when the endpoint answers an upload with an error status."""
+
+    def __init__(self, message: str, status: int):
+        super().__init__(message)
+        self.status = status
+
+
+class BatchUploadRejected(UploadFailed):
+    """Raised when the endpoint refuses a JSON array payload."""
 
-def decode_jwt(token: str) -> dict:
-    """Decode JWT token to see its contents (for debugging)"""
-    try:
-        parts = token.split('.')
-        if len(parts) != 3:
-            return {}
-        
-        payload = parts[1]
-        padding = 4 - len(payload) % 4
-        if padding != 4:
-            payload += '=' * padding
-        
-        decoded = base64.b64decode(payload)
-        return json.loads(decoded)
-    except Exception as e:
-        print(f"Could not decode token: {e}")
-        return {}
+
+class TokenRejected(UploadFailed):
+    """Raised when the endpoint refuses the access token (401/403)."""
+
+
+class EndpointUnreachable(RuntimeError):
+    """Raised when the first upload shows the endpoint cannot be used at all."""
 
 
 async def upload_document(
@@ -43,60 +58,95 @@ async def upload_document(
     access_token: str,
     upload_url: str,
 ) -> Dict:
-    """Upload a JSON document to the OVB API"""
-    if not path_to_file.exists():
-        raise FileNotFoundError(f"File not found: {path_to_file}")
-    
-    with open(path_to_file, 'r', encoding='utf-8') as f:
-        json_data = json.load(f)
-    
-    json_content = json.dumps(json_data, ensure_ascii=False)
-    
+    """Upload a JSON document to the OVB API, streaming the file as-is"""
     headers = {
         "Authorization": f"Bearer {access_token}",
         "Content-Type": "application/json; charset=utf-8"
     }
     
-    print(f"Uploading file: {path_to_file.name}")
-    print(f"Upload URL: {upload_url}")
-    print(f"Token: {access_token[:20]}...")
-    print(f"JSON size: {len(json_content)} bytes")
-    print(f"Document ID: {json_data.get('document_id', 'N/A')}")
-    
+    with open(path_to_file, 'rb') as f:
+        logger.info("Uploading file: %s", path_to_file.name)
+        logger.info("Upload URL: %s", upload_url)
+        logger.info("Token: %s...", access_token[:20])
+        logger.info("JSON size: %d bytes", os.fstat(f.fileno()).st_size)
+        
+        # aiohttp reads the file in large chunks off the event loop and sends
+        # it with a Content-Length taken from the file size.
+        async with session.post(upload_url, data=f, headers=headers) as response:
+            status = response.status
+            response_text = await response.text()
+            
+            logger.info("Response Status: %d", status)
+            # The headers proxy is only rendered when DEBUG output is enabled
+            logger.debug("Response Headers: %s", response.headers)
+            logger.info("Response Body: %s", response_text)
+            
+            if status in TOKEN_REJECTED_STATUS:
+                raise TokenRejected(f"Upload failed: {status} {response_text}", status)
+            if status >= 400:
+                raise UploadFailed(f"Upload failed: {status} {response_text}", status)
+            
+            try:
+                return orjson.loads(response_text)
+            except orjson.JSONDecodeError:
+                return {"status": status, "response": response_text}
+
+
+async def upload_batch(
+    session: aiohttp.ClientSession,
+    paths: List[Path],
+    access_token: str,
+    upload_url: str,
+) -> Any:
+    """Upload several JSON documents as a single JSON array request."""
+    # The array is spliced together from the raw file bytes; no need to parse
+    # and re-serialize documents the server will parse anyway.
+    documents = await asyncio.gather(*(asyncio.to_thread(path.read_bytes) for path in paths))
+    json_content = b"[" + b",".join(documents) + b"]"
+
+    headers = {
+        "Authorization": f"Bearer {access_token}",
+        "Content-Type": "application/json; charset=utf-8"
+    }
+
+    logger.info("Uploading batch of %d file(s): %s", len(paths), ", ".join(p.name for p in paths))
+    logger.info("JSON size: %d bytes", len(json_content))
+
     async with session.post(upload_url, data=json_content, headers=headers) as response:
         status = response.status
         response_text = await response.text()
-        
-        print(f"\nResponse Status: {status}")
-        print(f"Response Headers: {dict(response.headers)}")
-        print(f"Response Body: {response_text}")
-        
+
+        logger.info("Response Status: %d", status)
+        logger.info("Response Body: %s", response_text)
+
+        if status in BATCH_REJECTED_STATUS:
+            raise BatchUploadRejected(f"Batch upload rejected: {status} {response_text}", status)
+        if status in TOKEN_REJECTED_STATUS:
+            raise TokenRejected(f"Batch upload failed: {status} {response_text}", status)
         if status >= 400:
-            raise RuntimeError(f"Upload failed: {status} {response_text}")
-        
+            raise UploadFailed(f"Batch upload failed: {status} {response_text}", status)
+
         try:
-            return await response.json()
-        except:
+            return orjson.loads(response_text)
+        except orjson.JSONDecodeError:
             return {"status": status, "response": response_text}
 
 
 def _parse_candidate_urls() -> List[str]:
     """Collect candidate upload endpoints while preserving order."""
     unique: List[str] = []
+    seen: Set[str] = set()
 
     def _add(values: Iterable[str]) -> None:
         for value in values:
             candidate = value.strip()
-            if candidate and candidate not in unique:
+            if candidate and candidate not in seen:
+                seen.add(candidate)
                 unique.append(candidate)
 
     configured_list = config("OVB__UPLOAD_API_URLS", default="")
     if configured_list:
-        separators = [",", ";", " "]
-        temp = [configured_list]
-        for separator in separators:
-            temp = [fragment for item in temp for fragment in item.split(separator)]
-        _add(temp)
+        _add(re.split(r"[,;\s]+", configured_list))
 
     configured_single = config("OVB__UPLOAD_API_URL", default="")
     if configured_single:
@@ -107,31 +157,62 @@ def _parse_candidate_urls() -> List[str]:
 
 
 async def select_upload_endpoint(session: aiohttp.ClientSession) -> str:
-    """Probe candidate endpoints and return the first one that responds."""
+    """Probe candidate endpoints concurrently and return the highest-priority one that responds."""
     candidates = _parse_candidate_urls()
     if not candidates:
         raise RuntimeError("No upload endpoint candidates found.")
 
     acceptable_status = {200, 201, 202, 204, 301, 302, 307, 308, 401, 403, 405, 415}
 
-    for candidate in candidates:
-        print(f"Probing upload endpoint: {candidate}")
-        for method in ("head", "options", "get"):
-            try:
-                async with session.request(method, candidate, allow_redirects=True) as response:
-                    status = response.status
-                    print(f"  {method.upper()} -> {status}")
-                    if status in acceptable_status:
-                        print(f"Using upload endpoint: {candidate} (probe {method.upper()} -> {status})\n")
-                        return candidate
-            except aiohttp.ClientError as exc:
-                print(f"  {method.upper()} failed: {exc}")
-
-        print(f"Endpoint probe failed: {candidate}\n")
+    async def _probe(candidate: str, method: str) -> Optional[Tuple[str, int]]:
+        try:
+            async with session.request(method, candidate, allow_redirects=True) as response:
+                status = response.status
+        except aiohttp.ClientError as exc:
+            logger.info("  %s %s failed: %s", method.upper(), candidate, exc)
+            return None
+
+        logger.info("  %s %s -> %d", method.upper(), candidate, status)
+        if status in acceptable_status:
+            return method, status
+        return None
+
+    logger.info("Probing upload endpoints: %s", ", ".join(candidates))
+    # Every probe starts at once, but candidates are decided in priority
+    # order: a candidate only wins once all candidates before it have failed.
+    tasks = [
+        [asyncio.create_task(_probe(candidate, method)) for method in ("head", "options", "get")]
+        for candidate in candidates
+    ]
+    try:
+        for candidate, candidate_tasks in zip(candidates, tasks):
+            for next_done in asyncio.as_completed(candidate_tasks):
+                probe = await next_done
+                if probe is not None:
+                    method, status = probe
+                    logger.info("Using upload endpoint: %s (probe %s -> %d)", candidate, method.upper(), status)
+                    return candidate
+    finally:
+        for candidate_tasks in tasks:
+            for task in candidate_tasks:
+                task.cancel()
 
     raise RuntimeError("Could not validate any configured upload endpoint.")
 
 
+async def resolve_upload_endpoint(session: aiohttp.ClientSession) -> str:
+    """Return the upload endpoint, probing only when there is a choice or OVB__DIAG is set.
+
+    An unprobed endpoint is checked by the first upload instead (see upload_directory).
+    """
+    candidates = _parse_candidate_urls()
+    if len(candidates) > 1 or config("OVB__DIAG", default=False, cast=bool):
+        return await select_upload_endpoint(session)
+
+    logger.info("Using upload endpoint: %s", candidates[0])
+    return candidates[0]
+
+
 def resolve_upload_directory() -> Path:
     """Return the directory containing files to upload."""
     directory = Path(
@@ -155,7 +236,76 @@ def resolve_upload_delay() -> float:
     return max(delay_value, 0.0)
 
 
-def write_summary(upload_dir: Path, upload_url: str, results: List[Dict]) -> Path:
+def resolve_upload_concurrency() -> int:
+    """Return the maximum number of uploads in flight at once."""
+    concurrency_raw = config("OVB__UPLOAD_CONCURRENCY", default=str(DEFAULT_UPLOAD_CONCURRENCY))
+    try:
+        concurrency_value = int(concurrency_raw)
+    except ValueError as exc:
+        raise ValueError("OVB__UPLOAD_CONCURRENCY must be an integer value") from exc
+
+    return max(concurrency_value, 1)
+
+
+def resolve_upload_batch_size() -> int:
+    """Return how many documents to send per import request (1 disables batching)."""
+    batch_size_raw = config("OVB__UPLOAD_BATCH_SIZE", default=str(DEFAULT_UPLOAD_BATCH_SIZE))
+    try:
+        batch_size_value = int(batch_size_raw)
+    except ValueError as exc:
+        raise ValueError("OVB__UPLOAD_BATCH_SIZE must be an integer value") from exc
+
+    return max(batch_size_value, 1)
+
+
+def _list_json_files(directory: Path) -> List[Path]:
+    """Return the visible *.json files in `directory`, sorted by name."""
+    # scandir reports the entry type from the directory listing itself, so
+    # only kept names are turned into Path objects.
+    with os.scandir(directory) as entries:
+        names = sorted(
+            entry.name
+            for entry in entries
+            if entry.name.endswith(".json") and not entry.name.startswith(".") and entry.is_file()
+        )
+    return [directory / name for name in names]
+
+
+def _chunked(items: List[Path], size: int) -> Iterator[List[Path]]:
+    iterator = iter(items)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def _batch_results(batch: List[Path], response: Any) -> List[Dict]:
+    """Map a batch response back to one result entry per file."""
+    if isinstance(response, list) and len(response) == len(batch):
+        responses = response
+    else:
+        responses = [response] * len(batch)
+
+    return [
+        {
+            "status": "success",
+            "file": file_path.name,
+            "response": item_response,
+        }
+        for file_path, item_response in zip(batch, responses)
+    ]
+
+
+def _batch_errors(batch: List[Path], exc: Exception) -> List[Dict]:
+    return [
+        {
+            "status": "error",
+            "file": file_path.name,
+            "error": str(exc),
+        }
+        for file_path in batch
+    ]
+
+
+def write_summary(upload_dir: Path, upload_url: str, results: List[Dict], successes: int) -> Path:
     """Persist a summary of the upload run in the upload directory."""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     summary_directory = Path(
@@ -165,7 +315,6 @@ def write_summary(upload_dir: Path, upload_url: str, results: List[Dict]) -> Pat
     summary_path = summary_directory / SUMMARY_FILE_TEMPLATE.format(timestamp=timestamp)
 
     total = len(results)
-    successes = sum(1 for item in results if item["status"] == "success")
     failures = total - successes
 
     summary_payload = {
@@ -177,10 +326,11 @@ def write_summary(upload_dir: Path, upload_url: str, results: List[Dict]) -> Pat
         "results": results,
     }
 
-    with open(summary_path, "w", encoding="utf-8") as summary_file:
-        json.dump(summary_payload, summary_file, indent=2, ensure_ascii=False)
+    summary_path.write_bytes(
+        orjson.dumps(summary_payload, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    )
 
-    print(f"Summary written to: {summary_path}")
+    logger.info("Summary written to: %s", summary_path)
     return summary_path
 
 
@@ -190,91 +340,181 @@ async def upload_directory(
     upload_url: str,
     access_token: str,
     delay_seconds: float,
-) -> List[Dict]:
-    """Sequentially upload all JSON files in the directory."""
-    files = sorted(upload_dir.glob("*.json"))
+    concurrency: int = DEFAULT_UPLOAD_CONCURRENCY,
+    batch_size: int = DEFAULT_UPLOAD_BATCH_SIZE,
+) -> Tuple[List[Dict], int]:
+    """Upload all JSON files in the directory with at most `concurrency` requests in flight.
+
+    Each upload slot pauses for `delay_seconds / concurrency` before taking the
+    next request, so `concurrency=1` keeps the original one-at-a-time pacing.
+    With `batch_size > 1` the first batch doubles as a probe: if the endpoint
+    rejects array payloads every file is uploaded individually instead.
+    A request rejected with 401/403 is retried once with a refreshed token.
+    The first request is sent on its own; if the endpoint cannot be reached or
+    answers 401/403/404/405 the run is aborted with EndpointUnreachable instead
+    of failing every file.
+
+    Returns:
+        The per-file results in file order and the number of successful uploads.
+    """
+    files = _list_json_files(upload_dir)
 
     if not files:
-        print(f"No JSON files found in directory: {upload_dir}")
-        return []
+        logger.info("No JSON files found in directory: %s", upload_dir)
+        return [], 0
+
+    logger.info(
+        "Found %d file(s) to upload in %s (concurrency=%d, batch_size=%d)",
+        len(files), upload_dir, concurrency, batch_size,
+    )
+
+    semaphore = asyncio.Semaphore(concurrency)
+    slot_delay = delay_seconds / concurrency
+    # One slot per file, filled in place as uploads finish
+    results: List[Dict] = [{}] * len(files)
+    successes = 0
+
+    async def _send(upload, files_or_batch):
+        """Run one upload request, retrying once with a fresh token on 401/403."""
+        nonlocal access_token
+        try:
+            return await upload(session, files_or_batch, access_token, upload_url)
+        except TokenRejected as exc:
+            logger.warning("⚠️ Access token rejected, refreshing and retrying once: %s", exc)
+        # Concurrent rejections are coalesced into one token request
+        access_token = await get_cached_token(session, force_refresh=True)
+        return await upload(session, files_or_batch, access_token, upload_url)
+
+    async def _send_first(upload, files_or_batch):
+        """Send the first request; failures meaning the endpoint is unusable abort the run."""
+        try:
+            return await _send(upload, files_or_batch)
+        except aiohttp.ClientConnectionError as exc:
+            raise EndpointUnreachable(f"Upload endpoint unreachable: {upload_url} ({exc})") from exc
+        except UploadFailed as exc:
+            if exc.status in ENDPOINT_UNUSABLE_STATUS:
+                raise EndpointUnreachable(f"Upload endpoint unusable: {upload_url} ({exc})") from exc
+            raise
 
-    print(f"Found {len(files)} file(s) to upload in {upload_dir}\n")
+    def _store(offset: int, entries: List[Dict], succeeded: bool) -> None:
+        nonlocal successes
+        results[offset:offset + len(entries)] = entries
+        if succeeded:
+            successes += len(entries)
 
-    results: List[Dict] = []
-    for index, file_path in enumerate(files):
+    async def _upload_single(offset: int, batch: List[Path], send=_send) -> None:
+        file_path = batch[0]
         try:
-            response = await upload_document(session, file_path, access_token, upload_url)
-            results.append(
-                {
-                    "status": "success",
-                    "file": file_path.name,
-                    "response": response,
-                }
-            )
-            print(f"✅ Upload succeeded: {file_path.name}\n")
+            response = await send(upload_document, file_path)
+        except EndpointUnreachable:
+            raise
         except Exception as exc:
-            results.append(
-                {
-                    "status": "error",
-                    "file": file_path.name,
-                    "error": str(exc),
-                }
-            )
-            print(f"❌ Upload failed: {file_path.name} -> {exc}\n")
+            logger.error("❌ Upload failed: %s -> %s", file_path.name, exc)
+            _store(offset, _batch_errors(batch, exc), False)
+            return
 
-        if index < len(files) - 1 and delay_seconds > 0:
-            print(f"Waiting {delay_seconds} second(s) before next upload...\n")
-            await asyncio.sleep(delay_seconds)
+        logger.info("✅ Upload succeeded: %s", file_path.name)
+        _store(offset, _batch_results(batch, response), True)
 
-    return results
+    async def _upload_batch(offset: int, batch: List[Path]) -> None:
+        try:
+            response = await _send(upload_batch, batch)
+        except Exception as exc:
+            logger.error("❌ Batch upload failed: %d file(s) -> %s", len(batch), exc)
+            _store(offset, _batch_errors(batch, exc), False)
+            return
 
+        logger.info("✅ Batch upload succeeded: %d file(s)", len(batch))
+        _store(offset, _batch_results(batch, response), True)
 
-async def main():
-    ssl_context = ssl.create_default_context()
-    ssl_context.check_hostname = False
-    ssl_context.verify_mode = ssl.CERT_NONE
-    
-    connector = aiohttp.TCPConnector(ssl=ssl_context)
-    async with aiohttp.ClientSession(connector=connector) as session:
+    async def _run(units: List[Tuple[int, List[Path]]], upload_unit) -> None:
+        last_index = len(units) - 1
+
+        async def _one(index: int, offset: int, batch: List[Path]) -> None:
+            async with semaphore:
+                await upload_unit(offset, batch)
+                if index < last_index and slot_delay > 0:
+                    await asyncio.sleep(slot_delay)
+
+        await asyncio.gather(*(_one(index, offset, batch) for index, (offset, batch) in enumerate(units)))
+
+    if batch_size > 1 and len(files) > 1:
+        units = list(zip(range(0, len(files), batch_size), _chunked(files, batch_size)))
+        probe_batch = units[0][1]
         try:
-            upload_dir = resolve_upload_directory()
-            delay_seconds = resolve_upload_delay()
-
-            print("Step 1: Getting access token...")
-            access_token = await get_ovb_access_token(session)
-            print(f"✅ Token received: {access_token[:30]}...\n")
-
-            token_payload = decode_jwt(access_token)
-            print("Token payload:")
-            print(f"  Issuer: {token_payload.get('iss')}")
-            print(f"  Subject: {token_payload.get('sub')}")
-            print(f"  Scopes: {token_payload.get('scope')}")
-            print(f"  Client ID: {token_payload.get('azp') or token_payload.get('client_id')}")
-            print(f"  Expires: {token_payload.get('exp')}")
-            print(f"  Full payload: {json.dumps(token_payload, indent=2)}\n")
-
-            print("Step 2: Resolving upload endpoint...")
-            upload_url = await select_upload_endpoint(session)
-
-            print("Step 3: Uploading documents...")
-            results = await upload_directory(
-                session=session,
-                upload_dir=upload_dir,
-                upload_url=upload_url,
-                access_token=access_token,
-                delay_seconds=delay_seconds,
-            )
-
-            summary_path = write_summary(upload_dir, upload_url, results)
-
-            print("\nUpload run completed.")
-            print(f"Total files: {len(results)}")
-            print(f"Summary file: {summary_path}")
-
-        except Exception as e:
-            print(f"\n❌ Error: {e}")
+            response = await _send_first(upload_batch, probe_batch)
+        except EndpointUnreachable:
             raise
+        except BatchUploadRejected as exc:
+            logger.warning("⚠️ Endpoint does not accept batches, falling back to per-file uploads: %s", exc)
+        except Exception as exc:
+            logger.error("❌ Batch upload failed: %d file(s) -> %s", len(probe_batch), exc)
+            _store(0, _batch_errors(probe_batch, exc), False)
+            await _run(units[1:], _upload_batch)
+            return results, successes
+        else:
+            logger.info("✅ Batch upload succeeded: %d file(s)", len(probe_batch))
+            _store(0, _batch_results(probe_batch, response), True)
+            await _run(units[1:], _upload_batch)
+            return results, successes
+
+    units = list(enumerate([file_path] for file_path in files))
+    await _upload_single(*units[0], send=_send_first)
+    if len(units) > 1 and slot_delay > 0:
+        await asyncio.sleep(slot_delay)
+    await _run(units[1:], _upload_single)
+    return results, successes
+
+
+async def main():
+    setup_logging()
+    session = await get_session()
+    try:
+        upload_dir = resolve_upload_directory()
+        delay_seconds = resolve_upload_delay()
+        concurrency = resolve_upload_concurrency()
+        batch_size = resolve_upload_batch_size()
+
+        logger.info("Step 1: Getting access token...")
+        access_token = await get_cached_token(session)
+        logger.info("✅ Token received: %s...", access_token[:30])
+
+        token_payload = decode_jwt(access_token)
+        logger.info("Token payload:")
+        logger.info("  Issuer: %s", token_payload.get("iss"))
+        logger.info("  Subject: %s", token_payload.get("sub"))
+        logger.info("  Scopes: %s", token_payload.get("scope"))
+        logger.info("  Client ID: %s", token_payload.get("azp") or token_payload.get("client_id"))
+        logger.info("  Expires: %s", token_payload.get("exp"))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("  Full payload: %s", orjson.dumps(token_payload, option=orjson.OPT_INDENT_2).decode())
+
+        logger.info("Step 2: Resolving upload endpoint...")
+        upload_url = await resolve_upload_endpoint(session)
+
+        logger.info("Step 3: Uploading documents...")
+        results, successes = await upload_directory(
+            session=session,
+            upload_dir=upload_dir,
+            upload_url=upload_url,
+            access_token=access_token,
+            delay_seconds=delay_seconds,
+            concurrency=concurrency,
+            batch_size=batch_size,
+        )
+
+        summary_path = write_summary(upload_dir, upload_url, results, successes)
+
+        logger.info("Upload run completed.")
+        logger.info("Total files: %d", len(results))
+        logger.info("Summary file: %s", summary_path)
+
+    except Exception as e:
+        logger.error("❌ Error: %s", e)
+        raise
+    finally:
+        await close_session()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    run(main())
\ No newline at end of file
@@ -0,0 +1,58 @@
+import asyncio
+import logging
+from typing import Any, Optional, Tuple
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+
+def write_json(path: str, body: Any) -> None:
+    """Write `body` as indented JSON to `path`, reporting instead of raising on IO errors."""
+    try:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(body, option=orjson.OPT_INDENT_2))
+        logger.info("Document data saved to: %s", path)
+    except (IOError, orjson.JSONEncodeError) as e:
+        logger.error("Failed to save document data to file: %s", e)
+
+
+class ArtifactWriter:
+    """Writes JSON artifacts on a background thread while downloads continue.
+
+    submit() queues a (path, body) pair; a single consumer task serializes and
+    writes them one at a time via asyncio.to_thread, so the event loop never
+    blocks on disk IO. join() waits for everything queued so far and stops
+    the consumer.
+    """
+
+    def __init__(self):
+        self._queue: "asyncio.Queue[Tuple[str, Any]]" = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            path, body = await self._queue.get()
+            try:
+                await asyncio.to_thread(write_json, path, body)
+            except Exception as e:
+                # Keep consuming; a dead consumer would leave join() waiting forever
+                logger.error("Failed to save document data to %s: %s", path, e)
+            finally:
+                self._queue.task_done()
+
+    async def submit(self, path: str, body: Any) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        await self._queue.put((path, body))
+
+    async def join(self) -> None:
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
@@ -1,20 +1,27 @@
 from __future__ import annotations
 import asyncio
 import aiohttp
+import logging
 import sys
 import os
+import socket
+import time
 from dataclasses import dataclass
 from typing import List, Optional
 import argparse
-from datetime import datetime, timezone
 from decouple import config
 
 document_details_url = config("STAGE_DOCUMENT_DETAILS_URL")
 default_scope = config("DEFAULT_SCOPE")
 
+from ..event_loop import run
+from ..logging_setup import setup_logging
+from ..rest_importer import close_session
 from ..rest_importer.auth import get_token
 from .list_documents import list_documents
 
+logger = logging.getLogger(__name__)
+
 
 @dataclass
 class DeleteResult:
@@ -39,24 +46,24 @@ async def delete_document_export(access_token: str, document_id: str, session: a
         'Authorization': f'Bearer {access_token}'
     }
     url = document_details_url.replace(":document_id", document_id)
-    # Use timezone.utc instead of datetime.UTC for compatibility with Python versions <3.11
-    start = datetime.now(timezone.utc)
+    # Monotonic clock: cheap to read and unaffected by wall-clock adjustments
+    start = time.perf_counter_ns()
     try:
         async with session.delete(url, headers=headers, params=params) as response:
             status = response.status
             if status < 300:
-                return DeleteResult(document_id=document_id, success=True, status=status, duration_ms=int((datetime.now(timezone.utc)-start).total_seconds()*1000))
+                return DeleteResult(document_id=document_id, success=True, status=status, duration_ms=(time.perf_counter_ns() - start) // 1_000_000)
             else:
                 # Try extract body for diagnostics
                 try:
                     body = await response.text()
                 except Exception:
                     body = '<no body>'
-                return DeleteResult(document_id=document_id, success=False, status=status, error=f"Unexpected status {status}: {body}", duration_ms=int((datetime.now(timezone.utc)-start).total_seconds()*1000))
+                return DeleteResult(document_id=document_id, success=False, status=status, error=f"Unexpected status {status}: {body}", duration_ms=(time.perf_counter_ns() - start) // 1_000_000)
     except aiohttp.ClientError as e:
-        return DeleteResult(document_id=document_id, success=False, error=str(e), duration_ms=int((datetime.now(timezone.utc)-start).total_seconds()*1000))
+        return DeleteResult(document_id=document_id, success=False, error=str(e), duration_ms=(time.perf_counter_ns() - start) // 1_000_000)
 
-async def delete_all_document_exports(scope: str = default_scope, confirm: bool = False, concurrency: int = 10, dry_run: bool = False, document_class_regex: Optional[str] = None) -> List[DeleteResult]:
+async def delete_all_document_exports(scope: str = default_scope, confirm: bool = False, concurrency: int = 10, dry_run: bool = False, document_class_regex: Optional[str] = None, ipv4_only: bool = False) -> List[DeleteResult]:
     """List all documents in given scope and delete export info for each.
 
     Parameters:
@@ -65,77 +72,112 @@ async def delete_all_document_exports(scope: str = default_scope, confirm: bool
         concurrency: Max number of simultaneous delete requests
         dry_run: If True, only prints planned deletions without performing
         document_class_regex: Filter pattern passed to list_documents
+        ipv4_only: Resolve hosts to IPv4 only (skips the AAAA lookup)
     """
     if concurrency < 1:
         raise ValueError("concurrency must be >= 1")
 
     access_token = await get_token()
-    print(f"🔐 Access token acquired (first 50 chars): {access_token[:50]}...")
+    logger.info("🔐 Access token acquired (first 50 chars): %s...", access_token[:50])
 
-    print(f"📄 Listing documents (scope={scope}, regex={document_class_regex})...")
+    logger.info("📄 Listing documents (scope=%s, regex=%s)...", scope, document_class_regex)
     documents = await list_documents(access_token, scope=scope, document_class_regex=document_class_regex)
 
     if not isinstance(documents, list):
         raise RuntimeError(f"Unexpected documents payload type: {type(documents)}; expected list of document IDs")
 
     total = len(documents)
-    print(f"Found {total} documents.")
+    logger.info("Found %s documents.", total)
 
     if total == 0:
         return []
 
     if dry_run:
-        print("🧪 Dry run: would delete export info for these documents:")
+        logger.info("🧪 Dry run: would delete export info for these documents:")
         for doc_id in documents:
-            print(f"  - {doc_id}")
-        print("Dry run complete. No deletions performed.")
+            logger.info("  - %s", doc_id)
+        logger.info("Dry run complete. No deletions performed.")
         return []
 
     if not confirm:
-        print("❌ Refusing to proceed: --confirm flag required (or use --dry-run to preview)")
+        logger.error("❌ Refusing to proceed: --confirm flag required (or use --dry-run to preview)")
         return []
 
-    semaphore = asyncio.Semaphore(concurrency)
-    results: List[DeleteResult] = []
-
-    async with aiohttp.ClientSession() as session:
-        async def worker(doc_id: str):
-            async with semaphore:
-                res = await delete_document_export(access_token, doc_id, session, scope=scope, document_class_regex=document_class_regex)
-                if res.status in (401, 403) and 'Not authenticated' in (res.error or ''):
-                    # Attempt single token refresh then retry once
-                    print(f"🔄 Auth retry for {doc_id} due to {res.status} ({res.error}). Refreshing token...")
-                    try:
-                        new_token = await get_token()
-                        nonlocal_access_token_holder[0] = new_token  # update shared token
-                        res = await delete_document_export(new_token, doc_id, session, scope=scope, document_class_regex=document_class_regex)
-                    except Exception as refresh_err:
-                        print(f"❌ Token refresh failed: {refresh_err}")
-                # Print progress line
-                if res.success:
-                    print(f"✅ Deleted export info for {doc_id} (status={res.status}, {res.duration_ms}ms)")
-                else:
-                    print(f"⚠️ Failed to delete {doc_id}: {res.error} (status={res.status})")
-                results.append(res)
-
-        # mutable holder for token so workers can update (list used for mutability in closure)
-        nonlocal_access_token_holder = [access_token]
-
-        tasks = [asyncio.create_task(worker(doc_id)) for doc_id in documents]
-        await asyncio.gather(*tasks)
+    # One slot per document, filled by index so workers never grow the list
+    results: List[Optional[DeleteResult]] = [None] * total
+    success_count = 0
+
+    connector = aiohttp.TCPConnector(
+        limit=max(concurrency * 2, 100),
+        limit_per_host=concurrency,
+        use_dns_cache=True,
+        ttl_dns_cache=600,
+        family=socket.AF_INET if ipv4_only else socket.AF_UNSPEC,
+        keepalive_timeout=75,
+    )
+    # mutable holder for token so workers can update (list used for mutability in closure)
+    access_token_holder = [access_token]
+    token_lock = asyncio.Lock()
+
+    async def refresh_token(rejected_token: str) -> str:
+        # Coalesce refreshes: only the first worker holding a rejected token
+        # re-authenticates, the rest pick up the token it fetched.
+        async with token_lock:
+            if access_token_holder[0] == rejected_token:
+                access_token_holder[0] = await get_token(force_refresh=True)
+            return access_token_holder[0]
+
+    async with aiohttp.ClientSession(connector=connector) as session:
+        async def delete_one(index: int, doc_id: str):
+            nonlocal success_count
+            token = access_token_holder[0]
+            res = await delete_document_export(token, doc_id, session, scope=scope, document_class_regex=document_class_regex)
+            if res.status in (401, 403) and 'Not authenticated' in (res.error or ''):
+                # Attempt single token refresh then retry once
+                logger.info("🔄 Auth retry for %s due to %s (%s). Refreshing token...", doc_id, res.status, res.error)
+                try:
+                    new_token = await refresh_token(token)
+                    res = await delete_document_export(new_token, doc_id, session, scope=scope, document_class_regex=document_class_regex)
+                except Exception as refresh_err:
+                    logger.error("❌ Token refresh failed: %s", refresh_err)
+            # Print progress line
+            if res.success:
+                success_count += 1
+                logger.info("✅ Deleted export info for %s (status=%s, %sms)", doc_id, res.status, res.duration_ms)
+            else:
+                logger.warning("⚠️ Failed to delete %s: %s (status=%s)", doc_id, res.error, res.status)
+            results[index] = res
+
+        # A fixed pool of `concurrency` workers drains a bounded queue, so only
+        # O(concurrency) tasks exist however many documents are in scope.
+        queue: asyncio.Queue[Optional[tuple[int, str]]] = asyncio.Queue(maxsize=concurrency * 4)
+
+        async def producer():
+            for item in enumerate(documents):
+                await queue.put(item)
+            for _ in range(concurrency):
+                await queue.put(None)
+
+        async def worker():
+            while (item := await queue.get()) is not None:
+                await delete_one(*item)
+
+        async with asyncio.TaskGroup() as task_group:
+            task_group.create_task(producer())
+            for _ in range(concurrency):
+                task_group.create_task(worker())
 
     # Summary
-    success_count = sum(1 for r in results if r.success)
     fail_count = total - success_count
-    print("\n====== Deletion Summary ======")
-    print(f"Total documents: {total}")
-    print(f"Successful deletions: {success_count}")
-    print(f"Failures: {fail_count}")
+    logger.info("====== Deletion Summary ======")
+    logger.info("Total documents: %s", total)
+    logger.info("Successful deletions: %s", success_count)
+    logger.info("Failures: %s", fail_count)
     if fail_count:
-        print("Failed document IDs:")
+        logger.info("Failed document IDs:")
         for r in results:
             if not r.success:
-                print(f" - {r.document_id}: {r.error}")
+                logger.info(" - %s: %s", r.document_id, r.error)
 
     return results
 
@@ -146,20 +188,26 @@ def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     parser.add_argument("--dry-run", action="store_true", help="Preview deletions without performing")
     parser.add_argument("--concurrency", type=int, default=10, help="Max concurrent delete operations (default: 10)")
     parser.add_argument("--document-class-regex", type=str, default=None, help="Filter documents by class regex")
+    parser.add_argument("--ipv4-only", action="store_true", help="Connect over IPv4 only (skip AAAA lookups)")
     return parser.parse_args(argv)
 
 async def async_main(args: argparse.Namespace):
-    return await delete_all_document_exports(scope=args.scope, confirm=args.confirm, concurrency=args.concurrency, dry_run=args.dry_run, document_class_regex=args.document_class_regex)
+    try:
+        return await delete_all_document_exports(scope=args.scope, confirm=args.confirm, concurrency=args.concurrency, dry_run=args.dry_run, document_class_regex=args.document_class_regex, ipv4_only=args.ipv4_only)
+    finally:
+        # token and listing calls go through the shared REST session
+        await close_session()
 
 def main(argv: Optional[List[str]] = None):
     args = parse_args(argv)
+    setup_logging()
     try:
-        asyncio.run(async_main(args))
+        run(async_main(args))
     except KeyboardInterrupt:
-        print("Interrupted by user.")
+        logger.info("Interrupted by user.")
         return 2
     except Exception as e:
-        print(f"❌ Unhandled error: {e}")
+        logger.error("❌ Unhandled error: %s", e)
         return 1
     return 0
 
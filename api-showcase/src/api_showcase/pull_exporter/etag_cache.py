@@ -0,0 +1,89 @@
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import orjson
+from decouple import config
+
+# Kept out of document_data/, which the risk-score run scans for documents
+DEFAULT_ETAG_CACHE_PATH = config("ETAG_CACHE_PATH", default=".etag_cache/index.json")
+
+_DEFAULT_CACHE: Optional["ETagCache"] = None
+
+
+class ETagCache:
+    """ETag index backing conditional GETs (If-None-Match / 304).
+
+    An entry holds only the ETag and the path of the artifact the body was
+    saved to; on a 304 the body is read back from that file. Entries live in
+    memory and are written back in one go by flush(), so a batch of lookups
+    touches the index file once.
+    """
+
+    def __init__(self, path: str = DEFAULT_ETAG_CACHE_PATH):
+        self.path = Path(path)
+        self._entries: Optional[Dict[str, Dict[str, str]]] = None
+        self._dirty = False
+        self._flush_lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Dict[str, str]]:
+        if self._entries is None:
+            try:
+                self._entries = orjson.loads(self.path.read_bytes())
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def get(self, key: str) -> Optional[Dict[str, str]]:
+        """Return the cached {"etag", "path"} entry for `key`, if any."""
+        return self._load().get(key)
+
+    def put(self, key: str, etag: Optional[str], path: Optional[str]) -> None:
+        """Point `key` at the artifact saved under `path`; responses without an ETag or artifact are not cached."""
+        if not etag or not path:
+            return
+        # Absolute, so the entry still resolves when run from another directory
+        self._load()[key] = {"etag": etag, "path": os.path.abspath(path)}
+        self._dirty = True
+
+    def load_body(self, entry: Dict[str, str]) -> Optional[Any]:
+        """Read a cached body back from its artifact (None if the file is gone or unreadable)."""
+        try:
+            with open(entry["path"], "rb") as f:
+                return orjson.loads(f.read())
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def store(self, key: str, etag: Optional[str], body: Any) -> None:
+        """Save `body` next to the index and cache it under `key`, for responses that have no artifact of their own."""
+        if not etag:
+            return
+        body_path = self.path.with_name(hashlib.sha1(key.encode()).hexdigest() + ".json")
+        body_path.parent.mkdir(parents=True, exist_ok=True)
+        body_path.write_bytes(orjson.dumps(body))
+        self.put(key, etag, body_path)
+
+    def flush(self) -> None:
+        """Write pending entries to disk (atomically via a temp file).
+
+        Blocking; async callers run it through asyncio.to_thread.
+        """
+        with self._flush_lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            data = orjson.dumps(self._entries)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, self.path)
+
+
+def get_etag_cache() -> ETagCache:
+    """Return the process-wide cache stored at ETAG_CACHE_PATH."""
+    global _DEFAULT_CACHE
+    if _DEFAULT_CACHE is None:
+        _DEFAULT_CACHE = ETagCache()
+    return _DEFAULT_CACHE
@@ -1,10 +1,20 @@
 from decouple import config
 import aiohttp
 import asyncio
+import logging
 import os
-import json
+import orjson
+from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
+from typing import Optional, Tuple
+from ..logging_setup import setup_logging
+from ..event_loop import run
+from ..rest_importer import auth_headers, close_session, get_session
 from ..rest_importer.auth import get_token
+from ..rest_importer.rate_limit import MAX_RETRIES, RETRY_STATUS, backoff_delay, get_rate_limiter
+from .artifact_writer import ArtifactWriter, write_json
+from .etag_cache import ETagCache, get_etag_cache
 
 email = config("EMAIL")
 password = config("PROD_PASSWORD", default=config("PASSWORD_DEV", default=""))
@@ -14,6 +24,67 @@ org_id = "ovb"
 scope = "production"
 document_class = ""
 
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ResultFileTarget:
+    """Where (and with which timestamp) fetched documents are saved."""
+    directory: str
+    name: str
+    ext: str
+    timestamp: str
+
+
+def prepare_result_target(path_to_result_file: str) -> ResultFileTarget:
+    """Split the result path, create its directory and fix the timestamp once."""
+    # Extract directory and create it if needed
+    directory, base_name = os.path.split(path_to_result_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    name, ext = os.path.splitext(base_name)
+    # If no extension provided, default to .json
+    return ResultFileTarget(
+        directory=directory,
+        name=name,
+        ext=ext or '.json',
+        timestamp=datetime.now().strftime("%Y%m%d_%H%M%S"),
+    )
+
+
+async def _save_document(document_id: str, document_details, path_to_result_file: str, target: Optional[ResultFileTarget] = None, writer: Optional[ArtifactWriter] = None) -> Optional[str]:
+    """Save one document's details and return the path they are written to."""
+    try:
+        target = target or prepare_result_target(path_to_result_file)
+    except IOError as e:
+        logger.error("Failed to save document data to file: %s", e)
+        return None
+    # Create new filename with timestamp
+    timestamped_filename = f"{target.name}_{document_id}_{target.timestamp}{target.ext}"
+    final_path = os.path.join(target.directory, timestamped_filename) if target.directory else timestamped_filename
+    
+    # Save the file, in the background when a writer is shared across a batch
+    if writer is not None:
+        await writer.submit(final_path, document_details)
+    else:
+        await asyncio.to_thread(write_json, final_path, document_details)
+    return final_path
+
+
+@lru_cache(maxsize=8)
+def _split_details_url(document_details_url: str) -> Tuple[str, str]:
+    """Split the URL template around `:document_id` once per template."""
+    prefix, placeholder, suffix = document_details_url.partition(":document_id")
+    if not placeholder:
+        raise ValueError(f"Document details URL has no :document_id placeholder: {document_details_url}")
+    return prefix, suffix
+
+
+def _document_params(org_id: str, scope: str, document_class_regex=None) -> dict:
+    params = {"organization_id": org_id, "scope": scope}
+    params.update({"document_class_regex": document_class_regex} if document_class_regex else {})
+    return params
+
 
 async def get_document_by_id(
     access_token,
@@ -23,70 +94,94 @@ async def get_document_by_id(
     org_id: str = org_id,
     document_details_url: str = document_details_url,
     print_results: bool = True,
-    path_to_result_file: str = None
+    path_to_result_file: str = None,
+    session: Optional[aiohttp.ClientSession] = None,
+    etag_cache: Optional[ETagCache] = None,
+    result_target: Optional[ResultFileTarget] = None,
+    writer: Optional[ArtifactWriter] = None,
+    params: Optional[dict] = None
 ):
+    """Fetch one document's details.
+
+    The last ETag seen for the document is sent as If-None-Match while its
+    previous result file exists; a 304 reads the body back from that file
+    (refetching once in full if that fails), so only documents saved via
+    `path_to_result_file` are cached. Without an explicit `etag_cache` the
+    shared cache is used and flushed right away; batch callers pass one in and
+    flush it themselves.
+    Requests go through the host's rate limiter, and 429/5xx responses are
+    retried with exponential backoff. Batch callers pass a prepared
+    `result_target` so the output directory and timestamp are set up once,
+    and an `ArtifactWriter` so the file writes overlap the next downloads.
+    They also build the query `params` once and share them across calls.
+    """
     if document_id is None:
         raise ValueError("Document ID must be given!")
     
-    headers = {
-        'Accept': 'application/json',
-        'Authorization': f'Bearer {access_token}'
-    }
+    headers = auth_headers(access_token)
+    params = params or _document_params(org_id, scope, document_class_regex)
     
-    params = {"organization_id": org_id, "scope": scope}
-    params.update({"document_class_regex": document_class_regex} if document_class_regex else {})
-    
-    url = document_details_url.replace(":document_id", document_id)
+    prefix, suffix = _split_details_url(document_details_url)
+    url = prefix + document_id + suffix
+
+    flush_cache = etag_cache is None
+    cache = etag_cache or get_etag_cache()
+    cache_key = f"document:{org_id}:{scope}:{document_class_regex or ''}:{document_id}"
+    cached = cache.get(cache_key)
+    # Only the artifact's presence is checked here; it is read on a 304 alone
+    if cached and os.path.exists(cached["path"]):
+        request_headers = {**headers, 'If-None-Match': cached["etag"]}
+    else:
+        request_headers = headers
     
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(url=url, headers=headers, params=params) as response:
-                print(f"Document retrieval status: {response.status}")
-                print(f"URL: {response.url}")
-                response.raise_for_status()
-                document_details = await response.json()
-                
-                # Print results if flag is set
-                if print_results:
-                    print(f"Document details for ID: {document_id}:\n")
-                    print(document_details)
-                
-                # Save to file if path is provided
-                if path_to_result_file:
-                    try:
-                        # Extract directory and create it if needed
-                        directory = os.path.dirname(path_to_result_file)
-                        if directory:
-                            os.makedirs(directory, exist_ok=True)
-                        
-                        # Add timestamp to filename
-                        current_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                        base_name = os.path.basename(path_to_result_file)
-                        name, ext = os.path.splitext(base_name)
-                        
-                        # If no extension provided, default to .json
-                        if not ext:
-                            ext = '.json'
-                        
-                        # Create new filename with timestamp
-                        timestamped_filename = f"{name}_{document_id}_{current_timestamp}{ext}"
-                        final_path = os.path.join(directory, timestamped_filename) if directory else timestamped_filename
-                        
-                        # Save the file
-                        with open(final_path, "w", encoding="utf-8") as f:
-                            json.dump(document_details, f, indent=2, ensure_ascii=False)
-                        print(f"Document data saved to: {final_path}")
-                    except IOError as e:
-                        print(f"Failed to save document data to file: {e}")
-                
-                return document_details
-                
-        except aiohttp.ClientError as e:
-            print(f"Failed to get document {document_id}: {e}")
-            if hasattr(e, "status"):
-                print(f"Status: {e.status}")
-            raise
+    session = session or await get_session()
+    limiter = get_rate_limiter(url)
+
+    async def fetch(request_headers) -> Optional[Tuple[object, Optional[str]]]:
+        """GET the document, retrying 429/5xx; returns None on a 304, else (details, ETag)."""
+        for attempt in range(MAX_RETRIES + 1):
+            await limiter.acquire()
+            async with session.get(url=url, headers=request_headers, params=params) as response:
+                limiter.observe(response)
+                logger.debug("Document retrieval status: %s", response.status)
+                logger.debug("URL: %s", response.url)
+                if response.status in RETRY_STATUS and attempt < MAX_RETRIES:
+                    retry_delay = backoff_delay(attempt)
+                elif response.status == 304 and 'If-None-Match' in request_headers:
+                    return None
+                else:
+                    response.raise_for_status()
+                    return orjson.loads(await response.read()), response.headers.get("ETag")
+            logger.info("⏳ Retrying document %s in %.0fs...", document_id, retry_delay)
+            await asyncio.sleep(retry_delay)
+
+    try:
+        fetched = await fetch(request_headers)
+        if fetched is None:
+            cached_body = await asyncio.to_thread(cache.load_body, cached)
+            # A copy that went away since the check is fetched in full once more
+            fetched = (cached_body, cached["etag"]) if cached_body is not None else await fetch(headers)
+        document_details, etag = fetched
+        
+        # Print results if flag is set; full bodies are only logged at DEBUG
+        if print_results and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Document details for ID: %s:\n%s", document_id, document_details)
+        
+        # Save to file if path is provided
+        if path_to_result_file:
+            saved_path = await _save_document(document_id, document_details, path_to_result_file, result_target, writer)
+            cache.put(cache_key, etag, saved_path)
+            if flush_cache:
+                await asyncio.to_thread(cache.flush)
         
+        return document_details
+            
+    except aiohttp.ClientError as e:
+        logger.error("Failed to get document %s: %s", document_id, e)
+        if hasattr(e, "status"):
+            logger.error("Status: %s", e.status)
+        raise
+    
 async def get_documents_by_ids(
     access_token,
     document_ids: list[str],
@@ -96,7 +191,8 @@ async def get_documents_by_ids(
     document_details_url: str = document_details_url,
     print_results: bool = True,
     path_to_result_file: str = None,
-    max_concurrent: int = 5
+    max_concurrent: int = 5,
+    session: Optional[aiohttp.ClientSession] = None
 ):
     """
     Fetch multiple documents by their IDs concurrently.
@@ -111,6 +207,7 @@ async def get_documents_by_ids(
         print_results: Whether to print results to console
         path_to_result_file: Base path for saving results (will be modified per document)
         max_concurrent: Maximum number of concurrent requests (default: 5)
+        session: Session to reuse for every request (default: the shared session)
     
     Returns:
         Dictionary mapping document IDs to their details (or error info)
@@ -118,8 +215,18 @@ async def get_documents_by_ids(
     if not document_ids:
         raise ValueError("Document IDs list cannot be empty!")
     
-    print(f"Processing {len(document_ids)} documents...")
+    logger.info("Processing %s documents...", len(document_ids))
     
+    # One session for the whole batch so requests reuse keep-alive connections
+    session = session or await get_session()
+    # ETag cache entries are collected in memory and written once at the end
+    etag_cache = get_etag_cache()
+    result_target = prepare_result_target(path_to_result_file) if path_to_result_file else None
+    # Query params are identical for every document in the batch
+    params = _document_params(org_id, scope, document_class_regex)
+    # Result files are written on a background thread while fetching continues
+    writer = ArtifactWriter()
+
     # Use a semaphore to limit concurrent requests
     semaphore = asyncio.Semaphore(max_concurrent)
     
@@ -134,41 +241,56 @@ async def get_documents_by_ids(
                     org_id=org_id,
                     document_details_url=document_details_url,
                     print_results=print_results,
-                    path_to_result_file=path_to_result_file
+                    path_to_result_file=path_to_result_file,
+                    session=session,
+                    etag_cache=etag_cache,
+                    result_target=result_target,
+                    writer=writer,
+                    params=params
                 )
                 return doc_id, {"status": "success", "data": result}
             except Exception as e:
-                print(f"Error processing document {doc_id}: {e}")
+                logger.error("Error processing document %s: %s", doc_id, e)
                 return doc_id, {"status": "error", "error": str(e)}
     
-    # Create tasks for all documents
-    tasks = [fetch_with_semaphore(doc_id) for doc_id in document_ids]
+    # Repeated IDs share one fetch; dict.fromkeys keeps the first-seen order
+    unique_ids = list(dict.fromkeys(document_ids))
+    if len(unique_ids) < len(document_ids):
+        logger.info("Skipping %s duplicate document ID(s)", len(document_ids) - len(unique_ids))
     
-    # Execute all tasks concurrently
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    # Create tasks for all documents
+    tasks = [fetch_with_semaphore(doc_id) for doc_id in unique_ids]
     
-    # Convert results to dictionary
+    # Handle each document as soon as it lands rather than after the whole batch
     results_dict = {}
-    for result in results:
-        if isinstance(result, Exception):
-            print(f"Unexpected error: {result}")
-        else:
-            doc_id, doc_data = result
+    success_count = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                doc_id, doc_data = await next_done
+            except Exception as e:
+                logger.error("Unexpected error: %s", e)
+                continue
             results_dict[doc_id] = doc_data
+            if doc_data.get("status") == "success":
+                success_count += 1
+    finally:
+        await writer.join()
+        await asyncio.to_thread(etag_cache.flush)
     
     # Print summary
-    success_count = sum(1 for v in results_dict.values() if v.get("status") == "success")
     error_count = len(results_dict) - success_count
-    print(f"\n=== Summary ===")
-    print(f"Total documents: {len(document_ids)}")
-    print(f"Successful: {success_count}")
-    print(f"Failed: {error_count}")
+    logger.info("=== Summary ===")
+    logger.info("Total documents: %s", len(document_ids))
+    logger.info("Successful: %s", success_count)
+    logger.info("Failed: %s", error_count)
     
     return results_dict
 
 
 
 async def main():
+    setup_logging()
     try:
         access_token = await get_token(email=email, password=password, org_id=org_id)
         
@@ -201,11 +323,13 @@ async def main():
             max_concurrent=5
         )
         
-        print(f"\nProcessed {len(results)} documents")
+        logger.info("Processed %s documents", len(results))
 
     except Exception as e:
-        print(f"Error: {e}")
+        logger.error("Error: %s", e)
         raise
+    finally:
+        await close_session()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    run(main())
\ No newline at end of file
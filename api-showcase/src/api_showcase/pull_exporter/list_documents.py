@@ -1,8 +1,16 @@
 from decouple import config
 import aiohttp
 import asyncio
+import logging
+import os
+import orjson
+from typing import Optional
 
+from ..logging_setup import setup_logging
+from ..event_loop import run
+from ..rest_importer import auth_headers, close_session, get_session
 from ..rest_importer.auth import get_token
+from .etag_cache import get_etag_cache
 
 # API docs list scope values with leading capital letters:
 # Production, Development, Testing, Healthcheck, Training
@@ -19,50 +27,81 @@ default_scope = config("DEFAULT_SCOPE", default="Production")
 org_id = config("ORGANIZATION_ID")
 document_list_url = config("STAGE_DOCUMENTS_LIST_URL")
 
+logger = logging.getLogger(__name__)
 
 
-async def list_documents(access_token, scope: str = default_scope, document_class_regex=None):
+
+async def list_documents(access_token, scope: str = default_scope, document_class_regex=None, session: Optional[aiohttp.ClientSession] = None):
     # Normalize scope casing if provided in lowercase
     normalized_scope = ALLOWED_SCOPES.get(str(scope).lower(), scope)
-    headers = {
-        'Accept': 'application/json',
-        'Authorization': f'Bearer {access_token}'
-    }
+    headers = auth_headers(access_token)
     params = {"organization_id": org_id, "scope": normalized_scope}
     params.update({"document_class_regex": document_class_regex} if document_class_regex else {})
+
+    # Conditional GET: an unchanged listing comes back as a body-less 304
+    etag_cache = get_etag_cache()
+    cache_key = f"list:{org_id}:{normalized_scope}:{document_class_regex or ''}"
+    cached = etag_cache.get(cache_key)
+    # Only the cached listing's presence is checked here; it is read on a 304 alone
+    if cached and os.path.exists(cached["path"]):
+        request_headers = {**headers, 'If-None-Match': cached["etag"]}
+    else:
+        request_headers = headers
     
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(document_list_url, headers=headers, params=params) as response:
-                print(f"Status: {response.status}")
-                print(f"URL: {response.url}")
-                
-                if response.status != 200:
-                    # Print response body (attempt JSON first) for debugging
-                    raw_text = await response.text()
-                    try:
-                        as_json = await response.json()
-                        print(f"Error JSON: {as_json}")
-                    except Exception:
-                        print(f"Response body (text): {raw_text}")
-                
-                response.raise_for_status()
-                
-                documents = await response.json()
-                print(f"Response: {documents}")
-                return documents
-                
-        except aiohttp.ClientError as e:
-            print(f"Failed to list documents: {e}")
-            if hasattr(e, 'status'):
-                print(f"Status: {e.status}")
-            raise
+    session = session or await get_session()
+
+    async def fetch(request_headers):
+        """GET the listing; returns None on a 304, else the parsed listing."""
+        async with session.get(document_list_url, headers=request_headers, params=params) as response:
+            logger.debug("Status: %s", response.status)
+            logger.debug("URL: %s", response.url)
+
+            if response.status == 304 and 'If-None-Match' in request_headers:
+                return None
+            
+            # Read the body once and decode it only as far as needed
+            raw = await response.read()
+            if response.status != 200:
+                # Print response body (attempt JSON first) for debugging
+                try:
+                    logger.error("Error JSON: %s", orjson.loads(raw))
+                except orjson.JSONDecodeError:
+                    logger.error("Response body (text): %s", raw[:2048].decode(errors='replace'))
+            
+            response.raise_for_status()
+            
+            documents = orjson.loads(raw)
+            logger.debug("Response: %s", documents)
+            await asyncio.to_thread(etag_cache.store, cache_key, response.headers.get("ETag"), documents)
+            await asyncio.to_thread(etag_cache.flush)
+            return documents
+
+    try:
+        documents = await fetch(request_headers)
+        if documents is None:
+            documents = await asyncio.to_thread(etag_cache.load_body, cached)
+            if documents is not None:
+                logger.info("Listing unchanged (ETag %s), using cached response", cached['etag'])
+            else:
+                # The cached listing went away since the check; fetch it in full once more
+                documents = await fetch(headers)
+        return documents
+            
+    except aiohttp.ClientError as e:
+        logger.error("Failed to list documents: %s", e)
+        if hasattr(e, 'status'):
+            logger.error("Status: %s", e.status)
+        raise
 
 async def main():
-    token = await get_token()
-    # Call with default scope (will be normalized) unless overridden.
-    documents = await list_documents(access_token=token)
-    print(f"Fetched {len(documents)} document id(s)")
+    setup_logging()
+    try:
+        token = await get_token()
+        # Call with default scope (will be normalized) unless overridden.
+        documents = await list_documents(access_token=token)
+        logger.info("Fetched %s document id(s)", len(documents))
+    finally:
+        await close_session()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run(main())
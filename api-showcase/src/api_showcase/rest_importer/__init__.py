@@ -0,0 +1,49 @@
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+import aiohttp
+
+_SESSION: Optional[aiohttp.ClientSession] = None
+
+
+async def get_session() -> aiohttp.ClientSession:
+    """Return the shared REST API session, creating it on first use.
+
+    Auth, list, document and upload calls reuse its pooled keep-alive
+    connections instead of opening a new session (and TLS handshake) per call.
+    """
+    global _SESSION
+    if _SESSION is None or _SESSION.closed:
+        connector = aiohttp.TCPConnector(
+            limit=100,
+            limit_per_host=64,
+            use_dns_cache=True,
+            ttl_dns_cache=600,
+            keepalive_timeout=75,
+        )
+        _SESSION = aiohttp.ClientSession(connector=connector)
+    return _SESSION
+
+
+@lru_cache(maxsize=4)
+def auth_headers(access_token: str) -> Mapping[str, str]:
+    """Return the (read-only) JSON + bearer headers for `access_token`.
+
+    Built once per token, so concurrent requests share one headers object;
+    callers that add a header copy it first. Accept-Encoding is left to
+    aiohttp, which offers gzip/deflate (and br with Brotli installed) and
+    decompresses responses itself.
+    """
+    return MappingProxyType({
+        'Accept': 'application/json',
+        'Authorization': f'Bearer {access_token}'
+    })
+
+
+async def close_session() -> None:
+    """Close the shared REST API session if it was opened."""
+    global _SESSION
+    if _SESSION is not None and not _SESSION.closed:
+        await _SESSION.close()
+    _SESSION = None
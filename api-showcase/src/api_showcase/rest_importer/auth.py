@@ -1,45 +1,87 @@
 from decouple import config
 import aiohttp
 import asyncio
+import logging
+import time
+from typing import Dict, Optional, Tuple
+
+import orjson
+
+from ..event_loop import run
+from ..jwt_payload import decode_jwt
+from . import close_session, get_session
+from ..logging_setup import setup_logging
 
 
 EMAIL = config("EMAIL")
 PASSWORD = config("STAGE_PASSWORD", default=config("DEV_PASSWORD", default=""))
 AUTH_URL = config("STAGE_AUTH_URL")
 ORGANIZATION_ID="ovb"
+REFRESH_SKEW_SECONDS = 60
+AUTH_HEADERS = {
+    'Content-Type': 'application/json',
+    'Accept': 'application/json'
+}
+
+# (email, org_id, auth_url) -> (access_token, expires_at)
+_TOKEN_CACHE: Dict[Tuple[str, str, str], Tuple[str, float]] = {}
+_token_lock = asyncio.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+async def get_token(email: str = EMAIL, password: str = PASSWORD, org_id: str = ORGANIZATION_ID, auth_url: str = AUTH_URL, session: Optional[aiohttp.ClientSession] = None, force_refresh: bool = False):
+    """Get authentication token, reusing a cached one until shortly before it expires.
 
+    Callers that got a 401 pass force_refresh=True; concurrent callers are
+    coalesced so a burst of rejections triggers a single login.
+    """
+    key = (email, org_id, auth_url)
+    seen = _TOKEN_CACHE.get(key)
+    async with _token_lock:
+        cached = _TOKEN_CACHE.get(key)
+        if cached is not None:
+            token, expires_at = cached
+            refreshed_meanwhile = cached is not seen
+            if (refreshed_meanwhile or not force_refresh) and expires_at - time.time() > REFRESH_SKEW_SECONDS:
+                return token
 
-async def get_token(email: str = EMAIL, password: str = PASSWORD, org_id: str = ORGANIZATION_ID, auth_url: str = AUTH_URL):
-    """Get authentication token"""
-    print("🔐 Getting authentication token...")
+        token = await _request_token(email, password, org_id, auth_url, session)
+        if token:
+            expires_at = decode_jwt(token).get("exp")
+            _TOKEN_CACHE[key] = (token, float(expires_at) if expires_at else 0.0)
+        return token
+
+
+async def _request_token(email: str, password: str, org_id: str, auth_url: str, session: Optional[aiohttp.ClientSession]):
+    logger.info("🔐 Getting authentication token...")
     params = {"organization_id": org_id} if org_id else {}
     payload = {
         "email": email,
         "password": password
     }
-    headers = {
-        'Content-Type': 'application/json',
-        'Accept': 'application/json'
-    }
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.post(auth_url, params=params, json=payload, headers=headers) as response:
-                response.raise_for_status()
-                print(f"✅ Authentication successful")
-                token_data = await response.json()
-                return token_data.get('access_token')
-        except aiohttp.ClientError as e:
-            print(f"❌ Authentication failed: {e}")
-            raise
+    session = session or await get_session()
+    try:
+        async with session.post(auth_url, params=params, json=payload, headers=AUTH_HEADERS) as response:
+            response.raise_for_status()
+            logger.info("✅ Authentication successful")
+            token_data = orjson.loads(await response.read())
+            return token_data.get('access_token')
+    except aiohttp.ClientError as e:
+        logger.error("❌ Authentication failed: %s", e)
+        raise
 
 async def main():
+    setup_logging()
     try:
        
         access_token = await get_token()
 
     except Exception as e:
-        print(f"Error: {e}")
+        logger.error("Error: %s", e)
         raise
+    finally:
+        await close_session()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run(main())
@@ -0,0 +1,106 @@
+import asyncio
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+from decouple import config
+
+DEFAULT_RATE_PER_SECOND = config("REST_RATE_LIMIT_PER_SECOND", default=20.0, cast=float)
+DEFAULT_BURST = config("REST_RATE_LIMIT_BURST", default=20, cast=int)
+RETRY_STATUS = {429, 500, 502, 503, 504}
+MAX_RETRIES = 3
+MAX_BACKOFF_SECONDS = 30.0
+
+_LIMITERS: Dict[str, "RateLimiter"] = {}
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff for retry `attempt` (0-based), capped at MAX_BACKOFF_SECONDS."""
+    return min(2.0 ** attempt, MAX_BACKOFF_SECONDS)
+
+
+def _parse_seconds(value: Optional[str]) -> Optional[float]:
+    """Read a Retry-After / reset header as seconds from now (delta, epoch or HTTP date)."""
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return None
+    # Large values are absolute epoch timestamps rather than deltas
+    if seconds > 1e9:
+        seconds -= time.time()
+    return max(seconds, 0.0)
+
+
+class RateLimiter:
+    """Token bucket for one API host, tightened by the server's rate-limit headers.
+
+    acquire() waits for a token; observe() reads X-RateLimit-Remaining /
+    X-RateLimit-Reset and Retry-After from a response so the client slows
+    down before it runs into 429s. A rate of 0 disables the local bucket and
+    only the server headers apply.
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE_PER_SECOND, burst: int = DEFAULT_BURST):
+        self._rate = rate
+        self._burst = max(burst, 1)
+        self._tokens = float(self._burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        if self._rate > 0:
+            self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+        else:
+            self._tokens = float(self._burst)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+    def observe(self, response: aiohttp.ClientResponse) -> None:
+        headers = response.headers
+        now = time.monotonic()
+
+        retry_after = _parse_seconds(headers.get("Retry-After"))
+        if retry_after is not None:
+            self._blocked_until = max(self._blocked_until, now + retry_after)
+
+        remaining_raw = headers.get("X-RateLimit-Remaining")
+        if remaining_raw is None:
+            return
+        try:
+            remaining = float(remaining_raw)
+        except ValueError:
+            return
+        self._refill(now)
+        self._tokens = min(self._tokens, remaining)
+        reset = _parse_seconds(headers.get("X-RateLimit-Reset"))
+        if remaining <= 0 and reset is not None:
+            self._blocked_until = max(self._blocked_until, now + reset)
+
+
+def get_rate_limiter(url: str) -> RateLimiter:
+    """Return the limiter shared by every request to `url`'s host."""
+    host = urlsplit(url).netloc
+    limiter = _LIMITERS.get(host)
+    if limiter is None:
+        limiter = _LIMITERS[host] = RateLimiter()
+    return limiter
@@ -1,15 +1,20 @@
 
 import asyncio
 import aiohttp
+import logging
 import os
-import json
+import time
+import orjson
 from decouple import config
 
 from dataclasses import dataclass
 from typing import Optional
-from datetime import datetime, timezone
 
+from ..event_loop import run
+from . import auth_headers, close_session, get_session
 from .auth import get_token
+from .rate_limit import get_rate_limiter
+from ..logging_setup import setup_logging
 
 
 workflow = "/imd_check"  # default workflow path; will be sent as query param if provided
@@ -22,6 +27,8 @@ password = config("PROD_PASSWORD")
 
 scope = "production"
 
+logger = logging.getLogger(__name__)
+
 def get_document_id_from_path(file_path):
     return os.path.splitext(os.path.basename(file_path))[0]
 
@@ -44,17 +51,15 @@ async def upload_file(
     metadata: Optional[dict] = None,
     upload_url: str = upload_url,
     metadata_as_file: bool = False,
+    session: Optional[aiohttp.ClientSession] = None,
+    file_name: Optional[str] = None,
 ) -> UploadResult:
-    print("📃 Starting File Upload")
-    if not os.path.exists(file_path):
-        return UploadResult(
-            file_path=file_path,
-            success=False,
-            error=f"File not found: {file_path}"
-        )
+    logger.info("📃 Starting File Upload")
+    # Callers that listed the directory already know the base name
+    file_name = file_name or os.path.basename(file_path)
 
     # Build query params (API expects scope/workflow/document_id here, not in multipart body)
-    resolved_document_id = document_id or get_document_id_from_path(file_path=file_path)
+    resolved_document_id = document_id or os.path.splitext(file_name)[0]
     normalized_workflow = None
     if workflow:
         # Ensure workflow starts with a leading slash (API examples show '/root')
@@ -67,77 +72,90 @@ async def upload_file(
     }
     if normalized_workflow:
         params["workflow"] = normalized_workflow
-    headers = {
-        'Accept': 'application/json',
-        'Authorization': f'Bearer {access_token}'
-    }
+    headers = auth_headers(access_token)
 
-    start = datetime.now(timezone.utc)
+    start = time.perf_counter_ns()
 
+    f = None
     try:
-        async with aiohttp.ClientSession() as session:
-            data = aiohttp.FormData()
-            
-            with open(file_path, "rb") as f:
-                file_content = f.read()
-                file_name = os.path.basename(file_path)
-                data.add_field("file", file_content, filename=file_name, content_type="application/octet-stream")
-            # Only file and (optionally) metadata stay in multipart body; others moved to query params
-
-            # Add metadata if provided
-            if metadata:
-                metadata_json = json.dumps(metadata)
-                if metadata_as_file:
-                    data.add_field('metadata', metadata_json, filename='metadata.json', content_type='application/json')
-                else:
-                    data.add_field('metadata', metadata_json, content_type='application/json')
-
-            async with session.post(upload_url, headers=headers, params=params, data=data) as response:
-                # Debug: show the final resolved URL once (aiohttp Response has .url)
+        session = session or await get_session()
+        data = aiohttp.FormData()
+        
+        # Hand aiohttp the open file: it streams the part in chunks read off
+        # the event loop instead of holding the whole document in memory.
+        # Opening it can block too (e.g. on network shares), so use a thread.
+        f = await asyncio.to_thread(open, file_path, "rb")
+        data.add_field("file", f, filename=file_name, content_type="application/octet-stream")
+        # Only file and (optionally) metadata stay in multipart body; others moved to query params
+
+        # Add metadata if provided
+        if metadata:
+            metadata_json = orjson.dumps(metadata)
+            if metadata_as_file:
+                data.add_field('metadata', metadata_json, filename='metadata.json', content_type='application/json')
+            else:
+                data.add_field('metadata', metadata_json, content_type='application/json')
+
+        # Not retried here: the multipart body streams from the open file once
+        limiter = get_rate_limiter(upload_url)
+        await limiter.acquire()
+        async with session.post(upload_url, headers=headers, params=params, data=data) as response:
+            limiter.observe(response)
+            # Debug: show the final resolved URL once (aiohttp Response has .url)
+            try:
+                logger.debug("🌐 POST %s", response.url)
+            except Exception:
+                pass
+            status = response.status
+            # Keep the raw bytes: success parses them directly, errors decode them once
+            raw_bytes = None
+            try:
+                raw_bytes = await response.read()
+            except Exception:
+                pass
+            duration_ms = (time.perf_counter_ns() - start) // 1_000_000
+            if status < 300:
                 try:
-                    print(f"🌐 POST {response.url}")
-                except Exception:
-                    pass
-                status = response.status
-                raw_text = None
-                try:
-                    raw_text = await response.text()
+                    response_data = orjson.loads(raw_bytes)
+                    uploaded_doc_id = response_data.get("document_id", "unknown")
+                    logger.info("✅ Upload succeeded for %s -> document_id=%s", file_path, uploaded_doc_id)
+                    return UploadResult(
+                        file_path=file_path,
+                        success=True,
+                        document_id=uploaded_doc_id,
+                        status=status,
+                        duration_ms=duration_ms
+                    )
                 except Exception:
-                    raw_text = "<unable to read body>"
-                duration_ms = int((datetime.now(timezone.utc) - start).total_seconds() * 1000)
-                if status < 300:
-                    try:
-                        response_data = json.loads(raw_text) if raw_text not in (None, "") else await response.json()
-                        uploaded_doc_id = response_data.get("document_id", "unknown")
-                        print(f"✅ Upload succeeded for {file_path} -> document_id={uploaded_doc_id}")
-                        return UploadResult(
-                            file_path=file_path,
-                            success=True,
-                            document_id=uploaded_doc_id,
-                            status=status,
-                            duration_ms=duration_ms
-                        )
-                    except Exception:
-                        print("⚠️ Upload succeeded but JSON parsing failed; returning without document_id")
-                        return UploadResult(
-                            file_path=file_path,
-                            success=True,
-                            status=status,
-                            duration_ms=duration_ms
-                        )
-                else:
-                    body = raw_text or "<no body>"
-                    print(f"❌ Upload failed: HTTP {status} | Body: {body[:500]}")
+                    logger.warning("⚠️ Upload succeeded but JSON parsing failed; returning without document_id")
                     return UploadResult(
                         file_path=file_path,
-                        success=False,
+                        success=True,
                         status=status,
-                        error=f"HTTP {status}: {body}",
                         duration_ms=duration_ms
                     )
+            else:
+                if raw_bytes is None:
+                    body = "<unable to read body>"
+                else:
+                    body = raw_bytes.decode("utf-8", errors="replace") or "<no body>"
+                logger.error("❌ Upload failed: HTTP %s | Body: %s", status, body[:500])
+                return UploadResult(
+                    file_path=file_path,
+                    success=False,
+                    status=status,
+                    error=f"HTTP {status}: {body}",
+                    duration_ms=duration_ms
+                )
     
+    except FileNotFoundError:
+        return UploadResult(
+            file_path=file_path,
+            success=False,
+            error=f"File not found: {file_path}"
+        )
     except aiohttp.ClientError as e:
-        duration_ms = int((datetime.now(timezone.utc) - start).total_seconds() * 1000)
+        duration_ms = (time.perf_counter_ns() - start) // 1_000_000
         return UploadResult(
             file_path=file_path,
             success=False,
@@ -145,28 +163,35 @@ async def upload_file(
             duration_ms=duration_ms
         )
     except Exception as e:
-        duration_ms = int((datetime.now(timezone.utc) - start).total_seconds() * 1000)
+        duration_ms = (time.perf_counter_ns() - start) // 1_000_000
         return UploadResult(
             file_path=file_path,
             success=False,
             error=f"Unexpected error: {str(e)}",
             duration_ms=duration_ms
         )
+    finally:
+        if f is not None:
+            f.close()
     
 async def main():
-    access_token = await get_token()
-    file_path = "/Users/daniellanghann/src/api-showcase/api-showcase/src/api_showcase/rest_importer/test_documents/82101.pdf"
-    result = await upload_file(access_token=access_token, file_path=file_path, scope=scope, workflow=workflow)
+    setup_logging()
+    try:
+        access_token = await get_token()
+        file_path = "/Users/daniellanghann/src/api-showcase/api-showcase/src/api_showcase/rest_importer/test_documents/82101.pdf"
+        result = await upload_file(access_token=access_token, file_path=file_path, scope=scope, workflow=workflow)
+    finally:
+        await close_session()
     # Pretty print result
-    print("\n=== Upload Result ===")
-    print(json.dumps({
+    logger.info("=== Upload Result ===")
+    logger.info("%s", orjson.dumps({
         "file_path": result.file_path,
         "success": result.success,
         "document_id": result.document_id,
         "status": result.status,
         "error": result.error,
         "duration_ms": result.duration_ms
-    }, indent=2))
+    }, option=orjson.OPT_INDENT_2).decode())
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    run(main())
\ No newline at end of file
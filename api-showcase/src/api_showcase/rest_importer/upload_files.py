@@ -1,4 +1,4 @@
-"""Upload multiple files sequentially using the single-file upload logic.
+"""Upload multiple files concurrently using the single-file upload logic.
 
 Run as module:
     python -m api_showcase.rest_importer.upload_files
@@ -6,13 +6,19 @@ Run as module:
 Environment variables expected: STAGE_UPLOAD_URL / PROD_UPLOAD_URL plus ORGANIZATION_ID, auth vars.
 """
 import asyncio
+import logging
 import os
-import json
-from typing import List
+from typing import List, Optional
+
+import aiohttp
+import orjson
 from decouple import config
 
+from ..event_loop import run
+from . import close_session, get_session
 from .auth import get_token
 from .upload_file import upload_file, UploadResult
+from ..logging_setup import setup_logging
 
 
 workflow = "/root"  # Will be supplied via query params by upload_file
@@ -20,6 +26,8 @@ scope = "production"
 ENVIRONMENT = config("ENVIRONMENT", default="prod").lower()
 upload_url = config("STAGE_UPLOAD_URL") if ENVIRONMENT == "prod" else config("STAGE_UPLOAD_URL", default=config("STAGE_UPLOAD_URL"))
 
+logger = logging.getLogger(__name__)
+
 
 async def upload_files_from_folder(
     folder_path: str,
@@ -28,10 +36,12 @@ async def upload_files_from_folder(
     workflow: str = workflow,
     upload_url: str = upload_url,
     metadata: dict = None,
-    delay_between_uploads: float = 3.0
+    delay_between_uploads: float = 0.0,
+    session: Optional[aiohttp.ClientSession] = None,
+    max_concurrent: int = 8
 ) -> List[UploadResult]:
     """
-    Upload all files from a specified folder one by one.
+    Upload all files from a specified folder with at most `max_concurrent` uploads in flight.
     
     Args:
         folder_path: Path to the folder containing files to upload
@@ -40,133 +50,143 @@ async def upload_files_from_folder(
         workflow: Workflow path (default: /imd)
         upload_url: URL endpoint for uploads
         metadata: Optional metadata to attach to all uploads
-        delay_between_uploads: Delay in seconds between uploads (default: 3.0)
+        delay_between_uploads: Pause in seconds an upload slot takes before its next upload (default: 0.0)
+        session: Session to reuse for every upload (default: the shared session)
+        max_concurrent: Maximum number of concurrent uploads (default: 8)
     
     Returns:
-        List of UploadResult objects for each file
+        List of UploadResult objects for each file, in folder listing order
     """
     if not os.path.exists(folder_path):
-        print(f"❌ Folder not found: {folder_path}")
+        logger.error("❌ Folder not found: %s", folder_path)
         return []
     
     if not os.path.isdir(folder_path):
-        print(f"❌ Path is not a directory: {folder_path}")
+        logger.error("❌ Path is not a directory: %s", folder_path)
         return []
     
-    # Get all files in the folder (excluding subdirectories)
-    files = [
-        os.path.join(folder_path, f) 
-        for f in os.listdir(folder_path) 
-        if os.path.isfile(os.path.join(folder_path, f))
-    ]
+    # Get all files in the folder (excluding subdirectories); scandir reports
+    # the entry type with the listing, so no per-file stat() is needed
+    with os.scandir(folder_path) as entries:
+        files = [(entry.path, entry.name) for entry in entries if entry.is_file()]
     
     if not files:
-        print(f"⚠️ No files found in folder: {folder_path}")
+        logger.warning("⚠️ No files found in folder: %s", folder_path)
         return []
     
-    print(f"📁 Found {len(files)} file(s) to upload from: {folder_path}")
-    print(f"➡️ Using environment: {ENVIRONMENT} | upload_url={upload_url}")
-    print("-" * 60)
+    logger.info("📁 Found %s file(s) to upload from: %s", len(files), folder_path)
+    logger.info("➡️ Using environment: %s | upload_url=%s", ENVIRONMENT, upload_url)
+    logger.info("%s", "-" * 60)
     
-    results = []
+    session = session or await get_session()
     
     # Ensure workflow has leading slash (upload_file also normalizes, but we keep it explicit here)
     wf = workflow if workflow.startswith('/') else f"/{workflow}"
 
-    for i, file_path in enumerate(files, 1):
-        print(f"\n[{i}/{len(files)}] Uploading: {os.path.basename(file_path)}")
-        
-        result = await upload_file(
-            access_token=access_token,
-            file_path=file_path,
-            scope=scope,
-            workflow=wf,
-            metadata=metadata,
-            upload_url=upload_url,
-            metadata_as_file=True
-        )
-        
-        results.append(result)
-        
-        # Delay between uploads to avoid overwhelming the server
-        if i < len(files):
-            print(f"⏳ Waiting {delay_between_uploads}s before next upload...")
-            await asyncio.sleep(delay_between_uploads)
-    
-    return results
+    # The semaphore (plus the connector's per-host limit) does the throttling
+    semaphore = asyncio.Semaphore(max_concurrent)
+
+    async def upload_with_semaphore(i: int, file_path: str, file_name: str) -> UploadResult:
+        async with semaphore:
+            logger.info("[%s/%s] Uploading: %s", i, len(files), file_name)
+            result = await upload_file(
+                access_token=access_token,
+                file_path=file_path,
+                file_name=file_name,
+                scope=scope,
+                workflow=wf,
+                metadata=metadata,
+                upload_url=upload_url,
+                metadata_as_file=True,
+                session=session
+            )
+            if delay_between_uploads > 0 and i < len(files):
+                await asyncio.sleep(delay_between_uploads)
+            return result
+
+    # gather keeps results in the same order as `files`
+    return await asyncio.gather(*(upload_with_semaphore(i, file_path, file_name) for i, (file_path, file_name) in enumerate(files, 1)))
 
 
 def print_summary(results: List[UploadResult]):
     """Print a summary of all upload results."""
-    print("\n" + "=" * 60)
-    print("📊 UPLOAD SUMMARY")
-    print("=" * 60)
-    
-    successful = [r for r in results if r.success]
-    failed = [r for r in results if not r.success]
-    
-    print(f"\n✅ Successful uploads: {len(successful)}/{len(results)}")
-    print(f"❌ Failed uploads: {len(failed)}/{len(results)}")
+    logger.info("%s", "=" * 60)
+    logger.info("📊 UPLOAD SUMMARY")
+    logger.info("%s", "=" * 60)
+    
+    # One pass splits the results and sums the successful durations
+    successful, failed, total_duration = [], [], 0
+    for r in results:
+        if r.success:
+            successful.append(r)
+            total_duration += r.duration_ms or 0
+        else:
+            failed.append(r)
+    
+    logger.info("✅ Successful uploads: %s/%s", len(successful), len(results))
+    logger.info("❌ Failed uploads: %s/%s", len(failed), len(results))
     
     if successful:
-        total_duration = sum(r.duration_ms for r in successful if r.duration_ms)
-        avg_duration = total_duration / len(successful) if successful else 0
-        print(f"⏱️  Average upload time: {avg_duration:.0f}ms")
+        avg_duration = total_duration / len(successful)
+        logger.info("⏱️  Average upload time: %.0fms", avg_duration)
     
     if failed:
-        print("\n❌ Failed Files:")
+        logger.info("❌ Failed Files:")
         for result in failed:
-            print(f"  - {os.path.basename(result.file_path)}: {result.error}")
+            logger.info("  - %s: %s", os.path.basename(result.file_path), result.error)
     
-    print("\n" + "=" * 60)
+    logger.info("%s", "=" * 60)
 
 
 async def main():
-    # Get access token
-    access_token = await get_token()
-    
-    # Specify the folder path
-    # Resolve folder path relative to this script's directory for reliability
-    base_dir = os.path.dirname(__file__)
-    folder_path = os.path.join(base_dir, "test_documents/ALL")
-    
-    # Optional: Add metadata for all uploads
-    metadata = {
-        "batch_upload": True,
-        "uploaded_at": "2025-10-28"
-    }
-    print(f"Starting batch upload; environment={ENVIRONMENT}")
-    
-    # Upload all files from the folder
-    results = await upload_files_from_folder(
-        folder_path=folder_path,
-        access_token=access_token,
-        scope=scope,
-        workflow=workflow,
-        metadata=metadata,
-        delay_between_uploads=8
-    )
-    
-    # Print summary
-    print_summary(results)
-    
-    # Optionally, save results to a JSON file
-    output_file = "upload_results.json"
-    with open(output_file, "w") as f:
-        json.dump([
-            {
-                "file_path": r.file_path,
-                "success": r.success,
-                "document_id": r.document_id,
-                "status": r.status,
-                "error": r.error,
-                "duration_ms": r.duration_ms
-            }
-            for r in results
-        ], f, indent=2)
-    
-    print(f"\n💾 Results saved to: {output_file}")
+    setup_logging()
+    try:
+        # Get access token
+        access_token = await get_token()
+    
+        # Specify the folder path
+        # Resolve folder path relative to this script's directory for reliability
+        base_dir = os.path.dirname(__file__)
+        folder_path = os.path.join(base_dir, "test_documents/ALL")
+    
+        # Optional: Add metadata for all uploads
+        metadata = {
+            "batch_upload": True,
+            "uploaded_at": "2025-10-28"
+        }
+        logger.info("Starting batch upload; environment=%s", ENVIRONMENT)
+    
+        # Upload all files from the folder
+        results = await upload_files_from_folder(
+            folder_path=folder_path,
+            access_token=access_token,
+            scope=scope,
+            workflow=workflow,
+            metadata=metadata
+        )
+    
+        # Print summary
+        print_summary(results)
+    
+        # Optionally, save results to a JSON file
+        output_file = "upload_results.json"
+        with open(output_file, "wb") as f:
+            f.write(orjson.dumps([
+                {
+                    "file_path": r.file_path,
+                    "success": r.success,
+                    "document_id": r.document_id,
+                    "status": r.status,
+                    "error": r.error,
+                    "duration_ms": r.duration_ms
+                }
+                for r in results
+            ], option=orjson.OPT_INDENT_2))
+    
+        logger.info("💾 Results saved to: %s", output_file)
+    finally:
+        await close_session()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    run(main())
\ No newline at end of file
@@ -1,14 +1,21 @@
 import asyncio
 import aiohttp
+import logging
 import os
-import json
+import random
+import time
+import orjson
+from contextlib import ExitStack
 from decouple import config
 from pathlib import Path
 from dataclasses import dataclass
-from typing import Optional, List
-from datetime import datetime, timezone
+from typing import Callable, Optional, List, Mapping, Tuple
 
+from ..event_loop import run
+from . import auth_headers, close_session, get_session
 from .auth import get_token
+from .rate_limit import MAX_RETRIES, backoff_delay, get_rate_limiter
+from ..logging_setup import setup_logging
 
 
 workflow = "/"  # default root workflow; will be added as query param if provided
@@ -21,6 +28,12 @@ password = config("STAGE_PASSWORD")
 
 scope = "production"
 
+# A multipart POST is not idempotent: a 500 may come after the server stored
+# the upload, so only responses that mean "not processed" are retried
+UPLOAD_RETRY_STATUS = {429, 502, 503, 504}
+
+logger = logging.getLogger(__name__)
+
 @dataclass
 class FolderUploadResult:
     folder_path: str
@@ -44,11 +57,26 @@ async def upload_folder(
     retention_after_creation: Optional[str] = None,
     retention_after_finished: Optional[str] = None,
     file_extensions: Optional[List[str]] = None,
-    upload_url: str = upload_url
+    upload_url: str = upload_url,
+    session: Optional[aiohttp.ClientSession] = None,
+    files_per_request: Optional[int] = None,
+    max_concurrent: int = 8
 ) -> FolderUploadResult:
-    print(f"📁 Starting Folder Upload from: {folder_path}")
+    """Upload the files of `folder_path` to the folder upload endpoint.
+
+    By default all files go in a single multipart request. With
+    `files_per_request` set, the folder is split into requests of that many
+    files (1 = one request per file), at most `max_concurrent` in flight,
+    and the per-request results are merged.
+    """
+    logger.info("📁 Starting Folder Upload from: %s", folder_path)
     
-    if not os.path.exists(folder_path):
+    # Get all files from the folder; scandir reports the entry type with the
+    # listing, so no per-file stat() is needed
+    try:
+        with os.scandir(folder_path) as entries:
+            all_files = [entry for entry in entries if entry.is_file()]
+    except FileNotFoundError:
         return FolderUploadResult(
             folder_path=folder_path,
             success=False,
@@ -56,8 +84,7 @@ async def upload_folder(
             failed_files=[],
             error=f"Folder not found: {folder_path}"
         )
-    
-    if not os.path.isdir(folder_path):
+    except NotADirectoryError:
         return FolderUploadResult(
             folder_path=folder_path,
             success=False,
@@ -65,16 +92,12 @@ async def upload_folder(
             failed_files=[],
             error=f"Path is not a directory: {folder_path}"
         )
-    
-    # Get all files from the folder
-    folder = Path(folder_path)
-    all_files = [f for f in folder.iterdir() if f.is_file()]
 
     # Filter by extensions if provided
     if file_extensions:
-        file_extensions_lower = [ext.lower() if ext.startswith('.') else f'.{ext.lower()}' 
-                                for ext in file_extensions]
-        all_files = [f for f in all_files if f.suffix.lower() in file_extensions_lower]
+        allowed_extensions = frozenset(ext.lower() if ext.startswith('.') else f'.{ext.lower()}'
+                                       for ext in file_extensions)
+        all_files = [f for f in all_files if os.path.splitext(f.name)[1].lower() in allowed_extensions]
 
     if not all_files:
         return FolderUploadResult(
@@ -85,7 +108,7 @@ async def upload_folder(
             error="No files found in folder"
         )
     
-    print(f"📄 Found {len(all_files)} file(s) to upload")
+    logger.info("📄 Found %s file(s) to upload", len(all_files))
 
     # Build query params (API expects these rather than multipart form fields)
     normalized_workflow = None
@@ -108,120 +131,143 @@ async def upload_folder(
     if retention_after_finished:
         params["retention_after_finished"] = retention_after_finished
     
-    headers = {
-        'Accept': 'application/json',
-        'Authorization': f'Bearer {access_token}'
-    }
+    headers = auth_headers(access_token)
 
-    start = datetime.now(timezone.utc)
+    session = session or await get_session()
 
-    try:
-        async with aiohttp.ClientSession() as session:
-            data = aiohttp.FormData()  # body will only contain files + metadata + per-file mapping
-            
-            # Add all files to the form data
-            per_file_ids = {}
-            for file_path in all_files:
-                try:
-                    with open(file_path, "rb") as f:
-                        file_content = f.read()
-                        file_name = file_path.name
-                        # Add each file with the field name 'files'
-                        data.add_field(
-                            "files",
-                            file_content,
-                            filename=file_name,
-                            content_type="application/octet-stream"
-                        )
-                        # Derive document_id for each file (basename without extension)
-                        derived_id = file_path.stem
-                        per_file_ids[file_name] = derived_id
-                        print(f"  📎 Added: {file_name}")
-                except Exception as e:
-                    print(f"  ⚠️ Failed to read file {file_path.name}: {e}")
-                    continue
-            
-            # Attach per-file document IDs mapping as JSON file (if any)
-            if per_file_ids:
-                mapping_json = json.dumps({"document_ids": per_file_ids})
+    # By default the whole folder goes up in one multipart request
+    if not files_per_request or files_per_request >= len(all_files):
+        return await _upload_batch(session, folder_path, all_files, params, headers, metadata, upload_url)
+
+    # Otherwise split it into smaller requests that run concurrently, so a
+    # failed request only fails its own files
+    batches = [all_files[i:i + files_per_request] for i in range(0, len(all_files), files_per_request)]
+    logger.info("📦 Uploading in %s request(s) of up to %s file(s), %s at a time", len(batches), files_per_request, max_concurrent)
+    semaphore = asyncio.Semaphore(max_concurrent)
+
+    async def upload_with_semaphore(batch: List[os.DirEntry]) -> FolderUploadResult:
+        async with semaphore:
+            return await _upload_batch(session, folder_path, batch, params, headers, metadata, upload_url)
+
+    start = time.perf_counter_ns()
+    batch_results = await asyncio.gather(*(upload_with_semaphore(batch) for batch in batches))
+    duration_ms = (time.perf_counter_ns() - start) // 1_000_000
+    return _merge_batch_results(folder_path, batch_results, duration_ms)
+
+
+async def _upload_batch(
+    session: aiohttp.ClientSession,
+    folder_path: str,
+    files: List[os.DirEntry],
+    params: dict,
+    headers: Mapping[str, str],
+    metadata: Optional[dict],
+    upload_url: str
+) -> FolderUploadResult:
+    """POST `files` (plus their document_id mapping and metadata) in one multipart request."""
+    start = time.perf_counter_ns()
+
+    def build_form(open_files: ExitStack) -> aiohttp.FormData:
+        data = aiohttp.FormData()  # body will only contain files + metadata + per-file mapping
+        
+        # Add all files to the form data; the open files are streamed in
+        # chunks while the request is sent and closed afterwards
+        per_file_ids = {}
+        for entry in files:
+            try:
+                f = open_files.enter_context(open(entry.path, "rb"))
+                file_name = entry.name
+                # Add each file with the field name 'files'
                 data.add_field(
-                    "document_ids",
-                    mapping_json,
-                    filename="document_ids.json",
-                    content_type="application/json"
+                    "files",
+                    f,
+                    filename=file_name,
+                    content_type="application/octet-stream"
                 )
+                # Derive document_id for each file (basename without extension)
+                derived_id = os.path.splitext(file_name)[0]
+                per_file_ids[file_name] = derived_id
+                logger.debug("Added: %s", file_name)
+            except Exception as e:
+                logger.warning("  ⚠️ Failed to read file %s: %s", entry.name, e)
+                continue
+        logger.info("  📎 Added %s/%s files, skipped %s", len(per_file_ids), len(files), len(files) - len(per_file_ids))
+        
+        # Attach per-file document IDs mapping as JSON file (if any)
+        if per_file_ids:
+            mapping_json = orjson.dumps({"document_ids": per_file_ids})
+            data.add_field(
+                "document_ids",
+                mapping_json,
+                filename="document_ids.json",
+                content_type="application/json"
+            )
 
-            # Add metadata if provided; server complained expecting UploadFile so send as file part
-            if metadata:
-                metadata_json = json.dumps(metadata)
-                data.add_field(
-                    "metadata",
-                    metadata_json,
-                    filename="metadata.json",
-                    content_type="application/json"
+        # Add metadata if provided; server complained expecting UploadFile so send as file part
+        if metadata:
+            metadata_json = orjson.dumps(metadata)
+            data.add_field(
+                "metadata",
+                metadata_json,
+                filename="metadata.json",
+                content_type="application/json"
+            )
+        logger.debug("Form & query prepared:")
+        logger.debug("  query params: %s", params)
+        logger.debug("  per_file_ids (mapping file): %s", per_file_ids)
+        if metadata:
+            logger.debug("  metadata keys=%s", list(metadata.keys()))
+        return data
+
+    try:
+        # Make the request; 429/5xx and connection errors are retried
+        status, raw_bytes = await _post_with_retry(session, upload_url, build_form, headers, params)
+        duration_ms = (time.perf_counter_ns() - start) // 1_000_000
+        
+        if status < 300:
+            try:
+                response_data = orjson.loads(raw_bytes)
+                uploaded_file_names = [f.name for f in files]
+                logger.info("✅ Folder upload succeeded! Uploaded %s file(s)", len(uploaded_file_names))
+                return FolderUploadResult(
+                    folder_path=folder_path,
+                    success=True,
+                    uploaded_files=uploaded_file_names,
+                    failed_files=[],
+                    status=status,
+                    duration_ms=duration_ms,
+                    response_data=response_data
                 )
-            print("Form & query prepared:")
-            print(f"  query params: {params}")
-            print(f"  per_file_ids (mapping file): {per_file_ids}")
-            if metadata:
-                print(f"  metadata keys={list(metadata.keys())}")
-            
-            # Make the request
-            async with session.post(upload_url, headers=headers, params=params, data=data) as response:
-                try:
-                    print(f"🌐 POST {response.url}")
-                except Exception:
-                    pass
-                status = response.status
-                raw_text = None
-                try:
-                    raw_text = await response.text()
-                except Exception:
-                    raw_text = "<unable to read body>"
-                
-                duration_ms = int((datetime.now(timezone.utc) - start).total_seconds() * 1000)
-                
-                if status < 300:
-                    try:
-                        response_data = json.loads(raw_text) if raw_text not in (None, "") else await response.json()
-                        uploaded_file_names = [f.name for f in all_files]
-                        print(f"✅ Folder upload succeeded! Uploaded {len(uploaded_file_names)} file(s)")
-                        return FolderUploadResult(
-                            folder_path=folder_path,
-                            success=True,
-                            uploaded_files=uploaded_file_names,
-                            failed_files=[],
-                            status=status,
-                            duration_ms=duration_ms,
-                            response_data=response_data
-                        )
-                    except Exception as e:
-                        print(f"⚠️ Upload succeeded but JSON parsing failed: {e}")
-                        uploaded_file_names = [f.name for f in all_files]
-                        return FolderUploadResult(
-                            folder_path=folder_path,
-                            success=True,
-                            uploaded_files=uploaded_file_names,
-                            failed_files=[],
-                            status=status,
-                            duration_ms=duration_ms
-                        )
-                else:
-                    body = raw_text or "<no body>"
-                    print(f"❌ Folder upload failed: HTTP {status} | Body: {body[:500]}")
-                    failed_file_names = [f.name for f in all_files]
-                    return FolderUploadResult(
-                        folder_path=folder_path,
-                        success=False,
-                        uploaded_files=[],
-                        failed_files=failed_file_names,
-                        status=status,
-                        error=f"HTTP {status}: {body}",
-                        duration_ms=duration_ms
-                    )
+            except Exception as e:
+                logger.warning("⚠️ Upload succeeded but JSON parsing failed: %s", e)
+                uploaded_file_names = [f.name for f in files]
+                return FolderUploadResult(
+                    folder_path=folder_path,
+                    success=True,
+                    uploaded_files=uploaded_file_names,
+                    failed_files=[],
+                    status=status,
+                    duration_ms=duration_ms
+                )
+        else:
+            if raw_bytes is None:
+                body = "<unable to read body>"
+            else:
+                body = raw_bytes.decode("utf-8", errors="replace") or "<no body>"
+            logger.error("❌ Folder upload failed: HTTP %s | Body: %s", status, body[:500])
+            failed_file_names = [f.name for f in files]
+            return FolderUploadResult(
+                folder_path=folder_path,
+                success=False,
+                uploaded_files=[],
+                failed_files=failed_file_names,
+                status=status,
+                error=f"HTTP {status}: {body}",
+                duration_ms=duration_ms
+            )
     except aiohttp.ClientError as e:
-        duration_ms = int((datetime.now(timezone.utc) - start).total_seconds() * 1000)
-        failed_file_names = [f.name for f in all_files]
+        duration_ms = (time.perf_counter_ns() - start) // 1_000_000
+        failed_file_names = [f.name for f in files]
         return FolderUploadResult(
             folder_path=folder_path,
             success=False,
@@ -232,8 +278,8 @@ async def upload_folder(
         )
     
     except Exception as e:
-        duration_ms = int((datetime.now(timezone.utc) - start).total_seconds() * 1000)
-        failed_file_names = [f.name for f in all_files]
+        duration_ms = (time.perf_counter_ns() - start) // 1_000_000
+        failed_file_names = [f.name for f in files]
         return FolderUploadResult(
             folder_path=folder_path,
             success=False,
@@ -242,38 +288,111 @@ async def upload_folder(
             error=f"Unexpected error: {str(e)}",
             duration_ms=duration_ms
         )
+
+
+async def _post_with_retry(
+    session: aiohttp.ClientSession,
+    url: str,
+    build_form: Callable[[ExitStack], aiohttp.FormData],
+    headers: Mapping[str, str],
+    params: dict
+) -> Tuple[int, Optional[bytes]]:
+    """POST a multipart form, retrying 429/502/503/504 responses and connection errors.
+
+    A streamed file part can only be sent once, so `build_form` is called for
+    every attempt and the files it opens are closed after that attempt.
+    Requests go through the host's rate limiter, which also honours
+    Retry-After; backoff delays are jittered so concurrent uploads do not
+    retry in lockstep. Returns the final status and raw body; the last connection
+    error is re-raised once the attempts are used up.
+    """
+    limiter = get_rate_limiter(url)
+    for attempt in range(MAX_RETRIES + 1):
+        await limiter.acquire()
+        with ExitStack() as open_files:
+            # Opening the files is blocking IO, so it happens off the event loop
+            data = await asyncio.to_thread(build_form, open_files)
+            try:
+                async with session.post(url, headers=headers, params=params, data=data) as response:
+                    limiter.observe(response)
+                    logger.debug("🌐 POST %s", response.url)
+                    status = response.status
+                    # Keep the raw bytes: success parses them directly, errors decode them once
+                    raw_bytes = None
+                    try:
+                        raw_bytes = await response.read()
+                    except Exception:
+                        pass
+                    if status not in UPLOAD_RETRY_STATUS or attempt == MAX_RETRIES:
+                        return status, raw_bytes
+                    reason = f"HTTP {status}"
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == MAX_RETRIES:
+                    raise
+                reason = str(e) or type(e).__name__
+        # Equal jitter: half of the backoff is fixed, the other half random
+        retry_delay = backoff_delay(attempt) * random.uniform(0.5, 1.0)
+        logger.info("⏳ Folder upload failed (%s), retrying in %.1fs...", reason, retry_delay)
+        await asyncio.sleep(retry_delay)
+
+
+def _merge_batch_results(folder_path: str, batch_results: List[FolderUploadResult], duration_ms: int) -> FolderUploadResult:
+    """Combine the per-request results of a split folder upload into one."""
+    uploaded_files = [name for r in batch_results for name in r.uploaded_files]
+    failed_files = [name for r in batch_results for name in r.failed_files]
+    errors = [r.error for r in batch_results if r.error]
+    failed_statuses = [r.status for r in batch_results if not r.success and r.status]
+    responses = [r.response_data for r in batch_results if r.response_data is not None]
+    if failed_files:
+        logger.warning("⚠️ Folder upload partially failed: %s of %s file(s)", len(failed_files), len(uploaded_files) + len(failed_files))
+    return FolderUploadResult(
+        folder_path=folder_path,
+        success=all(r.success for r in batch_results),
+        uploaded_files=uploaded_files,
+        failed_files=failed_files,
+        status=failed_statuses[0] if failed_statuses else batch_results[0].status,
+        error="; ".join(errors) or None,
+        duration_ms=duration_ms,
+        response_data={"responses": responses} if responses else None
+    )
     
 async def main():
-    access_token = await get_token()
+    setup_logging()
+    try:
+        access_token = await get_token()
     
-    # Example: Upload all files from a folder
-    # Resolve folder path relative to this script if given as relative
-    default_rel = Path(__file__).parent / "test_documents"
-    folder_path = str(default_rel)
-    result = await upload_folder(
-        access_token=access_token,
-        folder_path=folder_path,
-        scope=scope,
-        workflow=workflow,
-        file_extensions=['.pdf'],  # Optional: filter by extension
-        metadata={"batch": "test_batch_001"}  # Optional metadata
-    )
+        # Example: Upload all files from a folder
+        # Resolve folder path relative to this script if given as relative
+        default_rel = Path(__file__).parent / "test_documents"
+        folder_path = str(default_rel)
+        result = await upload_folder(
+            access_token=access_token,
+            folder_path=folder_path,
+            scope=scope,
+            workflow=workflow,
+            file_extensions=['.pdf'],  # Optional: filter by extension
+            metadata={"batch": "test_batch_001"}  # Optional metadata
+        )
     
-    # Pretty print result
-    print("\n=== Folder Upload Result ===")
-    print(json.dumps({
-        "folder_path": result.folder_path,
-        "success": result.success,
-        "uploaded_files": result.uploaded_files,
-        "failed_files": result.failed_files,
-        "status": result.status,
-        "error": result.error,
-        "duration_ms": result.duration_ms,
-        "response_data": result.response_data
-    }, indent=2))
+        # Pretty print result
+        logger.info("=== Folder Upload Result ===")
+        logger.info("%s", orjson.dumps({
+            "folder_path": result.folder_path,
+            "success": result.success,
+            "uploaded_files": result.uploaded_files,
+            "failed_files": result.failed_files,
+            "status": result.status,
+            "error": result.error,
+            "duration_ms": result.duration_ms,
+            "response_data": result.response_data
+        }, option=orjson.OPT_INDENT_2).decode())
                     
+    finally:
+        await close_session()
+
+
 if __name__ == "__main__":
-    asyncio.run(main())    
+    run(main())    
 
 
 
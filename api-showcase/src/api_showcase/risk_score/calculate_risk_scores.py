@@ -1,3 +1,6 @@
+from .models import Question
+
+
 def parse_identifier_fields(identifier: str) -> dict:
     """
     Parse the document_class_identifier_by_organization string.
@@ -8,32 +11,24 @@ def parse_identifier_fields(identifier: str) -> dict:
     Returns:
         Dictionary with parsed fields: points, is_ko, is_plausible
     """
-    if not identifier or identifier.count('|') < 3:
+    if not identifier:
         return {'points': 0, 'is_ko': False, 'is_plausible': False}
     
-    parts = [part.strip() for part in identifier.split('|')]
+    # Peel off only the fields we need instead of splitting and stripping all parts
+    _, _, rest = identifier.partition('|')
+    points, _, rest = rest.partition('|')
+    is_ko, found_third_separator, rest = rest.partition('|')
+    if not found_third_separator:
+        return {'points': 0, 'is_ko': False, 'is_plausible': False}
+    is_plausible = rest.partition('|')[0]
+    points = points.strip()
     
     return {
-        'points': int(parts[1]) if parts[1].isdigit() else 0,
-        'is_ko': parts[2].lower() == 'true',
-        'is_plausible': parts[3].lower() == 'true'
+        'points': int(points) if points.isdigit() else 0,
+        'is_ko': is_ko.strip().lower() == 'true',
+        'is_plausible': is_plausible.strip().lower() == 'true'
     }
 
-def get_yes_no_value(node: dict) -> bool:
-    """
-    Extract the Yes/No value from a node's children.
-    
-    Args:
-        node: Document node dictionary
-        
-    Returns:
-        Boolean value (True for "True", False otherwise)
-    """
-    for child in node.get('children', []):
-        if child.get('document_class_display_name') == 'Yes/No':
-            return child.get('value', '').lower() == 'true'
-    return True  # Default to True if not found
-
 def get_document_id(document: dict) -> str:
     """
     Extract the document_id from the document.
@@ -48,35 +43,48 @@ def get_document_id(document: dict) -> str:
 
 def collect_questions(children: list) -> list:
     """
-    Recursively collect all questions with their metadata.
+    Collect all questions with their metadata, walking the tree depth-first.
+    
+    Uses an explicit stack instead of recursion; questions come out in the
+    same pre-order (parent before children, left to right) as before.
     
     Args:
         children: List of child nodes
         
     Returns:
-        List of question dictionaries
+        List of Question objects
     """
     questions = []
+    # Reversed so that pop() yields the leftmost child first
+    stack = list(reversed(children))
     
-    for child in children:
+    while stack:
+        child = stack.pop()
         identifier = child.get('document_class_identifier_by_organization')
+        grandchildren = child.get('children')
         
         if identifier and '|' in identifier:
             parsed = parse_identifier_fields(identifier)
-            yes_no_value = get_yes_no_value(child)
             
-            questions.append({
-                'identifier': identifier,
-                'points': parsed['points'],
-                'is_ko': parsed['is_ko'],
-                'is_plausible': parsed['is_plausible'],
-                'yes_no_value': yes_no_value,
-                'node': child
-            })
+            # The answer is the value of the question's Yes/No child
+            yes_no_value = True  # Default to True if not found
+            for grandchild in grandchildren or ():
+                if grandchild.get('document_class_display_name') == 'Yes/No':
+                    yes_no_value = grandchild.get('value', '').lower() == 'true'
+                    break
+            
+            questions.append(Question(
+                identifier=identifier,
+                question_text=identifier.partition('|')[0].strip(),
+                points=parsed['points'],
+                is_ko=parsed['is_ko'],
+                is_plausible=parsed['is_plausible'],
+                yes_no_value=yes_no_value
+            ))
         
-        # Recursively process children
-        if child.get('children'):
-            questions.extend(collect_questions(child['children']))
+        # Visit this node's children next
+        if grandchildren:
+            stack.extend(reversed(grandchildren))
     
     return questions
 
@@ -85,15 +93,15 @@ def calculate_total_risk_score(questions: list) -> int:
     Calculate total risk score from KO questions answered False.
     
     Args:
-        questions: List of question dictionaries
+        questions: List of Question objects
         
     Returns:
         Total risk score
     """
     return sum(
-        q['points'] 
+        q.points 
         for q in questions 
-        if q['is_ko'] and not q['yes_no_value']
+        if q.is_ko and not q.yes_no_value
     )
 
 def count_questions_answered_no(questions: list) -> int:
@@ -101,50 +109,71 @@ def count_questions_answered_no(questions: list) -> int:
     Count the total number of questions answered with No/False.
     
     Args:
-        questions: List of question dictionaries
+        questions: List of Question objects
         
     Returns:
         Count of questions answered No/False
     """
-    return sum(1 for q in questions if not q['yes_no_value'])
+    return sum(1 for q in questions if not q.yes_no_value)
 
 def count_ko_questions_answered_no(questions: list) -> int:
     """
     Count the number of KO questions answered with No/False.
     
     Args:
-        questions: List of question dictionaries
+        questions: List of Question objects
         
     Returns:
         Count of KO questions answered No/False
     """
-    return sum(1 for q in questions if q['is_ko'] and not q['yes_no_value'])
+    return sum(1 for q in questions if q.is_ko and not q.yes_no_value)
 
 def count_plausible_checks_answered_no(questions: list) -> int:
     """
     Count the number of plausible check questions answered with No/False.
     
     Args:
-        questions: List of question dictionaries
+        questions: List of Question objects
         
     Returns:
         Count of plausible check questions answered No/False
     """
-    return sum(1 for q in questions if q['is_plausible'] and not q['yes_no_value'])
+    return sum(1 for q in questions if q.is_plausible and not q.yes_no_value)
+
+def collect_questions_by_category(data: dict) -> list:
+    """
+    Collect the questions of every root category in one walk of the tree.
+    
+    The result can be passed to both analyze_document and create_csv_report
+    so the tree is only walked once when both outputs are produced.
+    
+    Args:
+        data: Input document data
+        
+    Returns:
+        List of (category_node, questions) tuples
+    """
+    root_children = data.get('document', {}).get('children', [])
+    return [
+        (category, collect_questions(category.get('children', [])))
+        for category in root_children
+    ]
 
-def calculate_category_metrics(category_node: dict) -> dict:
+def calculate_category_metrics(category_node: dict, questions: list = None) -> dict:
     """
     Calculate risk metrics for a specific category.
     
     Args:
         category_node: Category node from document
+        questions: The category's already collected questions (optional)
         
     Returns:
         Dictionary with category metrics
     """
-    questions = collect_questions(category_node.get('children', []))
+    if questions is None:
+        questions = collect_questions(category_node.get('children', []))
     
-    max_points = sum(q['points'] for q in questions)
+    max_points = sum(q.points for q in questions)
     risk_score = calculate_total_risk_score(questions)
     risk_ratio = risk_score / max_points if max_points > 0 else 0
     
@@ -156,12 +185,13 @@ def calculate_category_metrics(category_node: dict) -> dict:
         'risk_ratio': round(risk_ratio, 4)
     }
 
-def analyze_document(data: dict) -> dict:
+def analyze_document(data: dict, questions_by_category: list = None) -> dict:
     """
     Main function to analyze document and generate comprehensive report.
     
     Args:
         data: Input document data
+        questions_by_category: Result of collect_questions_by_category (optional)
         
     Returns:
         Dictionary with all calculated metrics
@@ -174,33 +204,49 @@ def analyze_document(data: dict) -> dict:
     filename = upload_data.get('document_id_by_organization', '')
     assessment = document.get('document_class', '').lstrip('/')
     
-    # Get root level children (categories)
-    root_children = document.get('children', [])
+    # Collect all questions from all levels, once per root category
+    if questions_by_category is None:
+        questions_by_category = collect_questions_by_category(data)
+    all_questions = [q for _, questions in questions_by_category for q in questions]
     
-    # Collect all questions from all levels
-    all_questions = []
-    for category in root_children:
-        all_questions.extend(collect_questions(category.get('children', [])))
-    
-    # Calculate metrics
+    # Calculate metrics in a single pass over the questions
     number_of_questions = len(all_questions)
-    number_of_ko_questions = sum(1 for q in all_questions if q['is_ko'])
-    number_of_plausible_checks = sum(1 for q in all_questions if q['is_plausible'])
-    number_of_questions_answered_no = count_questions_answered_no(all_questions)
-    number_of_ko_questions_answered_no = count_ko_questions_answered_no(all_questions)
-    number_of_plausible_checks_answered_no = count_plausible_checks_answered_no(all_questions)
+    number_of_ko_questions = 0
+    number_of_plausible_checks = 0
+    number_of_questions_answered_no = 0
+    number_of_ko_questions_answered_no = 0
+    number_of_plausible_checks_answered_no = 0
+    max_total_risk_points = 0
+    total_risk_score = 0
+    for q in all_questions:
+        points = q.points
+        is_ko = q.is_ko
+        is_plausible_check = q.is_plausible
+        answered_no = not q.yes_no_value
+        
+        max_total_risk_points += points
+        if is_ko:
+            number_of_ko_questions += 1
+        if is_plausible_check:
+            number_of_plausible_checks += 1
+        if answered_no:
+            number_of_questions_answered_no += 1
+            if is_ko:
+                number_of_ko_questions_answered_no += 1
+                # Risk score counts the points of KO questions answered False
+                total_risk_score += points
+            if is_plausible_check:
+                number_of_plausible_checks_answered_no += 1
     
     # Set is_plausible flag: True if no plausible checks were answered No, False otherwise
     is_plausible = (number_of_plausible_checks_answered_no == 0)
     
-    max_total_risk_points = sum(q['points'] for q in all_questions)
-    total_risk_score = calculate_total_risk_score(all_questions)
     risk_ratio = total_risk_score / max_total_risk_points if max_total_risk_points > 0 else 0
     
     # Calculate category-level metrics
     category_metrics = [
-        calculate_category_metrics(category) 
-        for category in root_children
+        calculate_category_metrics(category, questions) 
+        for category, questions in questions_by_category
     ]
     
     return {
@@ -221,11 +267,11 @@ def analyze_document(data: dict) -> dict:
     }
 
 if __name__ == "__main__":
-    import json
+    import orjson
 
     # Load your data
-    with open('/Users/daniellanghann/src/api-showcase/api-showcase/results_9fce5c4febdd4cd187240f088d2833f3_20251029_141452.json', 'r') as f:
-        data = json.load(f)
+    with open('/Users/daniellanghann/src/api-showcase/api-showcase/results_9fce5c4febdd4cd187240f088d2833f3_20251029_141452.json', 'rb') as f:
+        data = orjson.loads(f.read())
 
     result = analyze_document(data=data)
-    print(json.dumps(result, indent=2))
\ No newline at end of file
+    print(orjson.dumps(result, option=orjson.OPT_INDENT_2).decode())
\ No newline at end of file
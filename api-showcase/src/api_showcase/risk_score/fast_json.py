@@ -0,0 +1,9 @@
+import orjson
+from psycopg2.extras import Json
+
+
+class FastJson(Json):
+    """psycopg2 JSON adapter that serializes with orjson instead of the stdlib json module"""
+
+    def dumps(self, obj):
+        return orjson.dumps(obj).decode()
@@ -5,16 +5,21 @@ This script imports CSV report files into a PostgreSQL database table,
 storing all questions from a document as JSON in a single row.
 """
 
+import io
 import os
 import re
 import csv
-import json
+import struct
+import logging
 import psycopg2
-from collections import OrderedDict
-from psycopg2.extras import Json
 from pathlib import Path
 from datetime import datetime
 
+from ..logging_setup import setup_logging
+from .migrate import QUESTIONS_DATA_INDEX_SQL
+
+logger = logging.getLogger(__name__)
+
 
 # Database configuration
 DB_CONFIG = {
@@ -28,27 +33,82 @@ DB_CONFIG = {
 # CSV folder path
 CSV_FOLDER = '/Users/daniellanghann/src/api-showcase/api-showcase/csv_reports'
 
-# Table creation SQL
-CREATE_TABLE_SQL = """
-CREATE TABLE IF NOT EXISTS questions (
-    id SERIAL PRIMARY KEY,
-    document_id VARCHAR(255) NOT NULL UNIQUE,
+# Staging table for the bulk load, one row per question; temporary tables
+# are never WAL-logged and ON COMMIT DROP cleans it up with the import
+CREATE_STAGE_SQL = """
+CREATE TEMP TABLE questions_stage (
+    document_id VARCHAR(255) NOT NULL,
     filename VARCHAR(500),
-    questions_data JSONB NOT NULL,
-    total_questions INTEGER,
-    total_potential_risk_points INTEGER,
-    total_actual_risk_points INTEGER,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
+    position INTEGER NOT NULL,
+    category TEXT,
+    question TEXT,
+    answer TEXT,
+    potential_risk_points INTEGER,
+    actual_risk_points INTEGER,
+    ko_question TEXT,
+    plausible_check TEXT
+) ON COMMIT DROP;
+"""
+
+COPY_STAGE_SQL = """
+COPY questions_stage (
+    document_id, filename, position,
+    category, question, answer,
+    potential_risk_points, actual_risk_points,
+    ko_question, plausible_check
+) FROM STDIN WITH (FORMAT binary)
 """
 
-# Create indexes for better performance
-CREATE_INDEXES_SQL = """
-CREATE INDEX IF NOT EXISTS idx_questions_document_id ON questions(document_id);
-CREATE INDEX IF NOT EXISTS idx_questions_data ON questions USING GIN (questions_data);
+# Builds questions_data and the totals per document inside Postgres
+UPSERT_FROM_STAGE_SQL = """
+INSERT INTO questions (
+    document_id, filename, questions_data, 
+    total_questions, total_potential_risk_points, 
+    total_actual_risk_points
+)
+SELECT
+    document_id,
+    filename,
+    jsonb_agg(jsonb_build_object(
+        'category', category,
+        'question', question,
+        'answer', answer,
+        'potential_risk_points', potential_risk_points,
+        'actual_risk_points', actual_risk_points,
+        'ko_question', ko_question,
+        'plausible_check', plausible_check
+    ) ORDER BY position),
+    count(*),
+    sum(potential_risk_points),
+    sum(actual_risk_points)
+FROM questions_stage
+GROUP BY document_id, filename
+ON CONFLICT (document_id) 
+DO UPDATE SET
+    filename = EXCLUDED.filename,
+    questions_data = EXCLUDED.questions_data,
+    total_questions = EXCLUDED.total_questions,
+    total_potential_risk_points = EXCLUDED.total_potential_risk_points,
+    total_actual_risk_points = EXCLUDED.total_actual_risk_points,
+    updated_at = CURRENT_TIMESTAMP
 """
 
+# Dropped before and rebuilt after loads of at least GIN_REBUILD_THRESHOLD
+# documents: one sorted index build beats that many GIN insertions
+DROP_QUESTIONS_DATA_INDEX_SQL = "DROP INDEX IF EXISTS idx_questions_data"
+GIN_REBUILD_THRESHOLD = 1000
+
+# COPY binary format framing: signature, flags and header extension length,
+# per-row field count, NULL field length, and the end-of-data marker
+COPY_BINARY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('!ii', 0, 0)
+COPY_BINARY_FIELD_COUNT = struct.pack('!h', 10)
+COPY_BINARY_NULL = struct.pack('!i', -1)
+COPY_BINARY_TRAILER = struct.pack('!h', -1)
+
+
+# Pattern for the document_id embedded in file names
+DOCUMENT_ID_RE = re.compile(r'report_([a-f0-9]{32})_')
+
 
 def extract_document_id(filename):
     """
@@ -56,8 +116,7 @@ def extract_document_id(filename):
     Example: report_0a65f6b3176b4f43888238c21148c680_20251029_182403.csv
     Returns: 0a65f6b3176b4f43888238c21148c680
     """
-    pattern = r'report_([a-f0-9]{32})_'
-    match = re.search(pattern, filename)
+    match = DOCUMENT_ID_RE.search(filename)
     if match:
         return match.group(1)
     else:
@@ -65,153 +124,191 @@ def extract_document_id(filename):
 
 
 def connect_to_database():
-    """Establish connection to PostgreSQL database."""
+    """
+    Establish connection to PostgreSQL database.
+    The import is one explicit transaction committed at the end. The load is
+    idempotent, so the session skips waiting for the WAL flush on commit.
+    """
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        print(f"✓ Connected to database '{DB_CONFIG['database']}' successfully")
+        conn = psycopg2.connect(**DB_CONFIG, options='-c synchronous_commit=off')
+        conn.autocommit = False
+        logger.info("✓ Connected to database '%s' successfully", DB_CONFIG['database'])
         return conn
     except psycopg2.Error as e:
-        print(f"✗ Error connecting to database: {e}")
+        logger.error("✗ Error connecting to database: %s", e)
         raise
 
 
-def create_table(conn):
-    """Create the questions table if it doesn't exist."""
-    try:
-        with conn.cursor() as cursor:
-            cursor.execute(CREATE_TABLE_SQL)
-            cursor.execute(CREATE_INDEXES_SQL)
-            conn.commit()
-        print("✓ Table 'questions' created/verified successfully")
-    except psycopg2.Error as e:
-        print(f"✗ Error creating table: {e}")
-        conn.rollback()
-        raise
+def ensure_schema(conn):
+    """Check that the questions table exists; it is created by migrate.py."""
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT to_regclass('questions')")
+        exists = cursor.fetchone()[0] is not None
+    conn.rollback()
+    if not exists:
+        raise RuntimeError(
+            "Table 'questions' not found; run python -m api_showcase.risk_score.migrate first"
+        )
+    logger.info("✓ Table 'questions' verified")
+
 
+def _to_int(value):
+    """Convert a CSV points cell to int, treating missing or empty cells as 0."""
+    return int(value) if value else 0
 
-def import_csv_file(conn, filepath):
-    """Import a single CSV file into the database."""
+
+def read_csv_file(filepath):
+    """
+    Read a single CSV report into flat question rows.
+    Returns (document_id, filename, questions) where each question is a
+    (category, question, answer, potential_risk_points, actual_risk_points,
+    ko_question, plausible_check) tuple, or None if the file could not be read.
+    """
     filename = os.path.basename(filepath)
     
     try:
         # Extract document_id from filename
         document_id = extract_document_id(filename)
-        print(f"\nProcessing: {filename}")
-        print(f"  Document ID: {document_id}")
-        
-        # Read CSV file
-        with open(filepath, 'r', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            rows = list(reader)
+        logger.debug("Processing: %s", filename)
+        logger.debug("  Document ID: %s", document_id)
         
-        if not rows:
-            print(f"  ⚠ Warning: No data found in {filename}")
-            return 0
-        
-        # Convert CSV rows to JSON structure
-        questions_data = []
+        # Read the CSV in one pass; the JSON itself is assembled by Postgres
+        questions = []
         total_potential = 0
         total_actual = 0
         
-        for row in rows:
-            potential_points = int(row.get('potential_risk_points', 0)) if row.get('potential_risk_points') else 0
-            actual_points = int(row.get('actual_risk_points', 0)) if row.get('actual_risk_points') else 0
-            
-            # Maintain field order: category, question, answer, then the rest
-            from collections import OrderedDict
-            question_obj = OrderedDict([
-                ('category', row.get('category', '')),
-                ('question', row.get('question', '')),
-                ('answer', row.get('answer', '')),
-                ('potential_risk_points', potential_points),
-                ('actual_risk_points', actual_points),
-                ('ko_question', row.get('ko_question', '')),
-                ('plausible_check', row.get('plausible_check', ''))
-            ])
-            questions_data.append(question_obj)
-            total_potential += potential_points
-            total_actual += actual_points
-        
-        # Insert or update the record
-        insert_sql = """
-        INSERT INTO questions (
-            document_id, filename, questions_data, 
-            total_questions, total_potential_risk_points, 
-            total_actual_risk_points
-        ) VALUES (
-            %s, %s, %s, %s, %s, %s
-        )
-        ON CONFLICT (document_id) 
-        DO UPDATE SET
-            filename = EXCLUDED.filename,
-            questions_data = EXCLUDED.questions_data,
-            total_questions = EXCLUDED.total_questions,
-            total_potential_risk_points = EXCLUDED.total_potential_risk_points,
-            total_actual_risk_points = EXCLUDED.total_actual_risk_points,
-            updated_at = CURRENT_TIMESTAMP
-        """
+        with open(filepath, 'r', encoding='utf-8') as csvfile:
+            for row in csv.DictReader(csvfile):
+                potential_points = _to_int(row.get('potential_risk_points'))
+                actual_points = _to_int(row.get('actual_risk_points'))
+                
+                questions.append((
+                    row.get('category', ''),
+                    row.get('question', ''),
+                    row.get('answer', ''),
+                    potential_points,
+                    actual_points,
+                    row.get('ko_question', ''),
+                    row.get('plausible_check', '')
+                ))
+                total_potential += potential_points
+                total_actual += actual_points
         
-        with conn.cursor() as cursor:
-            cursor.execute(insert_sql, (
-                document_id,
-                filename,
-                Json(questions_data),
-                len(questions_data),
-                total_potential,
-                total_actual
-            ))
-            conn.commit()
+        if not questions:
+            logger.warning("  ⚠ Warning: No data found in %s", filename)
+            return None
         
-        print(f"  ✓ Imported {len(questions_data)} questions")
-        print(f"  ✓ Total potential risk points: {total_potential}")
-        print(f"  ✓ Total actual risk points: {total_actual}")
-        return 1
+        logger.debug("  ✓ Read %s questions", len(questions))
+        logger.debug("  ✓ Total potential risk points: %s", total_potential)
+        logger.debug("  ✓ Total actual risk points: %s", total_actual)
+        return document_id, filename, questions
         
     except ValueError as e:
-        print(f"  ✗ Error: {e}")
-        return 0
+        logger.error("  ✗ Error: %s", e)
+        return None
     except Exception as e:
-        print(f"  ✗ Error importing {filename}: {e}")
-        conn.rollback()
-        return 0
+        logger.error("  ✗ Error reading %s: %s", filename, e)
+        return None
+
+
+def _binary_text(value):
+    """Encode a text column for COPY binary format; None becomes NULL."""
+    if value is None:
+        return COPY_BINARY_NULL
+    data = str(value).encode('utf-8')
+    return struct.pack('!i', len(data)) + data
+
+
+def _binary_int(value):
+    """Encode an INTEGER column for COPY binary format."""
+    return struct.pack('!ii', 4, value)
+
+
+def build_copy_buffer(records):
+    """
+    Write one COPY binary-format tuple per question into a BytesIO.
+    Binary values need no escaping and no text parsing on the server.
+    """
+    buf = io.BytesIO()
+    buf.write(COPY_BINARY_HEADER)
+    for document_id, filename, questions in records:
+        prefix = COPY_BINARY_FIELD_COUNT + _binary_text(document_id) + _binary_text(filename)
+        for position, (category, question, answer, potential_points, actual_points, ko_question, plausible_check) in enumerate(questions):
+            buf.write(prefix)
+            buf.write(_binary_int(position))
+            buf.write(_binary_text(category))
+            buf.write(_binary_text(question))
+            buf.write(_binary_text(answer))
+            buf.write(_binary_int(potential_points))
+            buf.write(_binary_int(actual_points))
+            buf.write(_binary_text(ko_question))
+            buf.write(_binary_text(plausible_check))
+    buf.write(COPY_BINARY_TRAILER)
+    buf.seek(0)
+    return buf
 
 
 def import_all_csv_files(conn, folder_path):
-    """Import all CSV files from the specified folder."""
+    """
+    Import all CSV files from the specified folder.
+    All question rows are streamed into a staging table with a single COPY
+    and aggregated into questions with one INSERT ... SELECT, committed once.
+    """
     folder = Path(folder_path)
     
     if not folder.exists():
-        print(f"✗ Error: Folder not found: {folder_path}")
+        logger.error("✗ Error: Folder not found: %s", folder_path)
         return
     
     # Find all CSV files matching the pattern
     csv_files = list(folder.glob('report_*.csv'))
     
     if not csv_files:
-        print(f"⚠ Warning: No CSV files found in {folder_path}")
+        logger.warning("⚠ Warning: No CSV files found in %s", folder_path)
         return
     
-    print(f"\nFound {len(csv_files)} CSV file(s) to import")
-    print("=" * 60)
-    
-    successful_imports = 0
+    logger.info("Found %s CSV file(s) to import", len(csv_files))
+    logger.info("%s", "=" * 60)
     
+    # Keyed by document_id so a later report for the same document wins, as
+    # with the per-file upserts; ON CONFLICT cannot touch a row twice
+    records = {}
     for csv_file in csv_files:
-        result = import_csv_file(conn, csv_file)
-        if result > 0:
-            successful_imports += 1
+        record = read_csv_file(csv_file)
+        if record is not None:
+            records[record[0]] = record
+    
+    successful_imports = 0
+    if records:
+        try:
+            # Index drop and rebuild share the load's transaction, so a failed
+            # import rolls back to the original index
+            rebuild_index = len(records) >= GIN_REBUILD_THRESHOLD
+            with conn.cursor() as cursor:
+                if rebuild_index:
+                    cursor.execute(DROP_QUESTIONS_DATA_INDEX_SQL)
+                cursor.execute(CREATE_STAGE_SQL)
+                cursor.copy_expert(COPY_STAGE_SQL, build_copy_buffer(records.values()))
+                cursor.execute(UPSERT_FROM_STAGE_SQL)
+                if rebuild_index:
+                    cursor.execute(QUESTIONS_DATA_INDEX_SQL)
+            conn.commit()
+            successful_imports = len(records)
+        except (psycopg2.Error, struct.error) as e:
+            logger.error("✗ Error importing CSV files: %s", e)
+            conn.rollback()
     
-    print("\n" + "=" * 60)
-    print(f"✓ Import complete!")
-    print(f"  Documents imported: {successful_imports}/{len(csv_files)}")
+    logger.info("%s", "=" * 60)
+    logger.info("✓ Import complete!")
+    logger.info("  Documents imported: %s/%s", successful_imports, len(csv_files))
 
 
 def print_sample_queries():
     """Print some useful SQL query examples."""
-    print("\n" + "=" * 60)
-    print("USEFUL QUERIES:")
-    print("=" * 60)
-    print("""
+    logger.info("%s", "=" * 60)
+    logger.info("USEFUL QUERIES:")
+    logger.info("%s", "=" * 60)
+    logger.info("%s", """
 -- Get all data for a specific document:
 SELECT * FROM questions WHERE document_id = '0a65f6b3176b4f43888238c21148c680';
 
@@ -253,16 +350,17 @@ ORDER BY COUNT(*) DESC;
 
 def main():
     """Main execution function."""
-    print("CSV to PostgreSQL Importer (JSON Format)")
-    print("=" * 60)
+    setup_logging()
+    logger.info("CSV to PostgreSQL Importer (JSON Format)")
+    logger.info("%s", "=" * 60)
     
     conn = None
     try:
         # Connect to database
         conn = connect_to_database()
         
-        # Create table if not exists
-        create_table(conn)
+        # Verify the schema created by migrate.py
+        ensure_schema(conn)
         
         # Import all CSV files
         import_all_csv_files(conn, CSV_FOLDER)
@@ -271,11 +369,11 @@ def main():
         print_sample_queries()
         
     except Exception as e:
-        print(f"\n✗ Fatal error: {e}")
+        logger.error("✗ Fatal error: %s", e)
     finally:
         if conn:
             conn.close()
-            print("\n✓ Database connection closed")
+            logger.info("✓ Database connection closed")
 
 
 if __name__ == "__main__":
@@ -1,9 +1,16 @@
 import os
 import re
-import json
+import orjson
+import logging
 import psycopg2
-from psycopg2.extras import Json
+from psycopg2.extras import execute_values
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from ..logging_setup import setup_logging
+from .fast_json import FastJson
+
+logger = logging.getLogger(__name__)
 
 
 # Database configuration
@@ -18,37 +25,44 @@ DB_CONFIG = {
 # JSON folder path
 JSON_FOLDER = '/Users/daniellanghann/src/api-showcase/api-showcase/results'
 
-# Table creation SQL
-CREATE_TABLE_SQL = """
-        CREATE TABLE IF NOT EXISTS assessment_results (
-            id SERIAL PRIMARY KEY,
-            document_id VARCHAR(255) NOT NULL UNIQUE,
-            filename VARCHAR(500),
-            assessment VARCHAR(100),
-            number_of_questions INTEGER,
-            number_of_ko_questions INTEGER,
-            number_of_plausible_checks INTEGER,
-            number_of_questions_answered_no INTEGER,
-            number_of_ko_questions_answered_no INTEGER,
-            number_of_plausible_checks_answered_no INTEGER,
-            is_plausible BOOLEAN,
-            max_total_risk_points INTEGER,
-            total_risk_score INTEGER,
-            risk_ratio DECIMAL(10, 4),
-            categories JSONB NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-    """
-
-# Create indexes for better performance
-CREATE_INDEXES_SQL = """
-CREATE INDEX IF NOT EXISTS idx_assessment_document_id ON assessment_results(document_id);
-CREATE INDEX IF NOT EXISTS idx_assessment_categories ON assessment_results USING GIN (categories);
-CREATE INDEX IF NOT EXISTS idx_assessment_risk_ratio ON assessment_results(risk_ratio);
-CREATE INDEX IF NOT EXISTS idx_assessment_is_plausible ON assessment_results(is_plausible);
+# Upsert used for every page of rows; execute_values expands VALUES %s
+INSERT_SQL = """
+INSERT INTO assessment_results (
+    document_id, filename, assessment,
+    number_of_questions, number_of_ko_questions, number_of_plausible_checks,
+    number_of_questions_answered_no, number_of_ko_questions_answered_no,
+    number_of_plausible_checks_answered_no, is_plausible,
+    max_total_risk_points, total_risk_score, risk_ratio,
+    categories
+) VALUES %s
+ON CONFLICT (document_id) 
+DO UPDATE SET
+    filename = EXCLUDED.filename,
+    assessment = EXCLUDED.assessment,
+    number_of_questions = EXCLUDED.number_of_questions,
+    number_of_ko_questions = EXCLUDED.number_of_ko_questions,
+    number_of_plausible_checks = EXCLUDED.number_of_plausible_checks,
+    number_of_questions_answered_no = EXCLUDED.number_of_questions_answered_no,
+    number_of_ko_questions_answered_no = EXCLUDED.number_of_ko_questions_answered_no,
+    number_of_plausible_checks_answered_no = EXCLUDED.number_of_plausible_checks_answered_no,
+    is_plausible = EXCLUDED.is_plausible,
+    max_total_risk_points = EXCLUDED.max_total_risk_points,
+    total_risk_score = EXCLUDED.total_risk_score,
+    risk_ratio = EXCLUDED.risk_ratio,
+    categories = EXCLUDED.categories,
+    updated_at = CURRENT_TIMESTAMP
 """
 
+# Rows sent per INSERT statement
+INSERT_PAGE_SIZE = 500
+
+# Threads reading JSON files in parallel
+READ_WORKERS = min(16, (os.cpu_count() or 1) * 2)
+
+
+# Pattern for the document_id embedded in file names
+DOCUMENT_ID_RE = re.compile(r'analytics_([a-f0-9]{32})_')
+
 
 def extract_document_id(filename):
     """
@@ -56,8 +70,7 @@ def extract_document_id(filename):
     Example: analytics_0a65f6b3176b4f43888238c21148c680_20251029_182402.json
     Returns: 0a65f6b3176b4f43888238c21148c680
     """
-    pattern = r'analytics_([a-f0-9]{32})_'
-    match = re.search(pattern, filename)
+    match = DOCUMENT_ID_RE.search(filename)
     if match:
         return match.group(1)
     else:
@@ -65,154 +78,148 @@ def extract_document_id(filename):
 
 
 def connect_to_database():
-    """Establish connection to PostgreSQL database."""
+    """
+    Establish connection to PostgreSQL database.
+    The import is one explicit transaction committed at the end. The load is
+    idempotent, so the session skips waiting for the WAL flush on commit.
+    """
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        print(f"✓ Connected to database '{DB_CONFIG['database']}' successfully")
+        conn = psycopg2.connect(**DB_CONFIG, options='-c synchronous_commit=off')
+        conn.autocommit = False
+        logger.info("✓ Connected to database '%s' successfully", DB_CONFIG['database'])
         return conn
     except psycopg2.Error as e:
-        print(f"✗ Error connecting to database: {e}")
+        logger.error("✗ Error connecting to database: %s", e)
         raise
 
 
-def create_table(conn):
-    """Create the assessment_results table if it doesn't exist."""
-    try:
-        with conn.cursor() as cursor:
-            cursor.execute(CREATE_TABLE_SQL)
-            cursor.execute(CREATE_INDEXES_SQL)
-            conn.commit()
-        print("✓ Table 'assessment_results' created/verified successfully")
-    except psycopg2.Error as e:
-        print(f"✗ Error creating table: {e}")
-        conn.rollback()
-        raise
+def ensure_schema(conn):
+    """Check that the assessment_results table exists; it is created by migrate.py."""
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT to_regclass('assessment_results')")
+        exists = cursor.fetchone()[0] is not None
+    conn.rollback()
+    if not exists:
+        raise RuntimeError(
+            "Table 'assessment_results' not found; run python -m api_showcase.risk_score.migrate first"
+        )
+    logger.info("✓ Table 'assessment_results' verified")
 
 
-def import_json_file(conn, filepath):
-    """Import a single JSON file into the database."""
+def read_json_file(filepath):
+    """
+    Read a single analytics JSON file into an assessment_results row.
+    Returns the row as a tuple in INSERT_SQL column order, or None if the
+    file could not be read.
+    """
     filename = os.path.basename(filepath)
     
     try:
         # Extract document_id from filename
         document_id = extract_document_id(filename)
-        print(f"\nProcessing: {filename}")
-        print(f"  Document ID: {document_id}")
+        logger.debug("Processing: %s", filename)
+        logger.debug("  Document ID: %s", document_id)
         
         # Read JSON file
-        with open(filepath, 'r', encoding='utf-8') as jsonfile:
-            data = json.load(jsonfile)
+        with open(filepath, 'rb') as jsonfile:
+            data = orjson.loads(jsonfile.read())
         
         if not data:
-            print(f"  ⚠ Warning: No data found in {filename}")
-            return 0
+            logger.warning("  ⚠ Warning: No data found in %s", filename)
+            return None
         
-        # Extract categories as JSON
-        categories = data.get('categories', [])
+        # Bind the lookup once; every column below is a plain dict.get
+        get = data.get
+        categories = get('categories', [])
+        is_plausible = get('is_plausible', False)
+        risk_ratio = get('risk_ratio', 0.0)
         
-        # Insert or update the record
-        insert_sql = """
-        INSERT INTO assessment_results (
-            document_id, filename, assessment,
-            number_of_questions, number_of_ko_questions, number_of_plausible_checks,
-            number_of_questions_answered_no, number_of_ko_questions_answered_no,
-            number_of_plausible_checks_answered_no, is_plausible,
-            max_total_risk_points, total_risk_score, risk_ratio,
-            categories
-        ) VALUES (
-            %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
+        logger.debug("  ✓ Read assessment: %s", get('assessment', 'N/A'))
+        logger.debug("  ✓ Risk ratio: %s", risk_ratio)
+        logger.debug("  ✓ Is plausible: %s", is_plausible)
+        logger.debug("  ✓ Categories: %s", len(categories))
+        return (
+            document_id,
+            get('filename', ''),
+            get('assessment', ''),
+            get('number_of_questions', 0),
+            get('number_of_ko_questions', 0),
+            get('number_of_plausible_checks', 0),
+            get('number_of_questions_answered_no', 0),
+            get('number_of_ko_questions_answered_no', 0),
+            get('number_of_plausible_checks_answered_no', 0),
+            is_plausible,
+            get('max_total_risk_points', 0),
+            get('total_risk_score', 0),
+            risk_ratio,
+            FastJson(categories)
         )
-        ON CONFLICT (document_id) 
-        DO UPDATE SET
-            filename = EXCLUDED.filename,
-            assessment = EXCLUDED.assessment,
-            number_of_questions = EXCLUDED.number_of_questions,
-            number_of_ko_questions = EXCLUDED.number_of_ko_questions,
-            number_of_plausible_checks = EXCLUDED.number_of_plausible_checks,
-            number_of_questions_answered_no = EXCLUDED.number_of_questions_answered_no,
-            number_of_ko_questions_answered_no = EXCLUDED.number_of_ko_questions_answered_no,
-            number_of_plausible_checks_answered_no = EXCLUDED.number_of_plausible_checks_answered_no,
-            is_plausible = EXCLUDED.is_plausible,
-            max_total_risk_points = EXCLUDED.max_total_risk_points,
-            total_risk_score = EXCLUDED.total_risk_score,
-            risk_ratio = EXCLUDED.risk_ratio,
-            categories = EXCLUDED.categories,
-            updated_at = CURRENT_TIMESTAMP
-        """
-        
-        with conn.cursor() as cursor:
-            cursor.execute(insert_sql, (
-                document_id,
-                data.get('filename', ''),
-                data.get('assessment', ''),
-                data.get('number_of_questions', 0),
-                data.get('number_of_ko_questions', 0),
-                data.get('number_of_plausible_checks', 0),
-                data.get('number_of_questions_answered_no', 0),
-                data.get('number_of_ko_questions_answered_no', 0),
-                data.get('number_of_plausible_checks_answered_no', 0),
-                data.get('is_plausible', False),
-                data.get('max_total_risk_points', 0),
-                data.get('total_risk_score', 0),
-                data.get('risk_ratio', 0.0),
-                Json(categories)
-            ))
-            conn.commit()
-        
-        print(f"  ✓ Imported assessment: {data.get('assessment', 'N/A')}")
-        print(f"  ✓ Risk ratio: {data.get('risk_ratio', 0.0)}")
-        print(f"  ✓ Is plausible: {data.get('is_plausible', False)}")
-        print(f"  ✓ Categories: {len(categories)}")
-        return 1
         
     except ValueError as e:
-        print(f"  ✗ Error: {e}")
-        return 0
-    except json.JSONDecodeError as e:
-        print(f"  ✗ Error parsing JSON in {filename}: {e}")
-        return 0
+        logger.error("  ✗ Error: %s", e)
+        return None
+    except orjson.JSONDecodeError as e:
+        logger.error("  ✗ Error parsing JSON in %s: %s", filename, e)
+        return None
     except Exception as e:
-        print(f"  ✗ Error importing {filename}: {e}")
-        conn.rollback()
-        return 0
+        logger.error("  ✗ Error reading %s: %s", filename, e)
+        return None
 
 
 def import_all_json_files(conn, folder_path):
-    """Import all JSON files from the specified folder."""
+    """
+    Import all JSON files from the specified folder.
+    All rows go to the server as multi-row INSERTs via execute_values and are
+    committed once.
+    """
     folder = Path(folder_path)
     
     if not folder.exists():
-        print(f"✗ Error: Folder not found: {folder_path}")
+        logger.error("✗ Error: Folder not found: %s", folder_path)
         return
     
     # Find all JSON files matching the pattern
     json_files = list(folder.glob('analytics_*.json'))
     
     if not json_files:
-        print(f"⚠ Warning: No JSON files found in {folder_path}")
+        logger.warning("⚠ Warning: No JSON files found in %s", folder_path)
         return
     
-    print(f"\nFound {len(json_files)} JSON file(s) to import")
-    print("=" * 60)
+    logger.info("Found %s JSON file(s) to import", len(json_files))
+    logger.info("%s", "=" * 60)
     
-    successful_imports = 0
+    # Keyed by document_id so a later file for the same document wins, as
+    # with the per-file upserts; ON CONFLICT cannot touch a row twice
+    # File reads release the GIL, so a thread pool overlaps them; map keeps
+    # the glob order and the inserts stay on this thread's connection
+    rows = {}
+    with ThreadPoolExecutor(max_workers=READ_WORKERS) as executor:
+        for row in executor.map(read_json_file, json_files):
+            if row is not None:
+                rows[row[0]] = row
     
-    for json_file in json_files:
-        result = import_json_file(conn, json_file)
-        if result > 0:
-            successful_imports += 1
+    successful_imports = 0
+    if rows:
+        try:
+            with conn.cursor() as cursor:
+                execute_values(cursor, INSERT_SQL, list(rows.values()), page_size=INSERT_PAGE_SIZE)
+            conn.commit()
+            successful_imports = len(rows)
+        except psycopg2.Error as e:
+            logger.error("✗ Error importing JSON files: %s", e)
+            conn.rollback()
     
-    print("\n" + "=" * 60)
-    print(f"✓ Import complete!")
-    print(f"  Documents imported: {successful_imports}/{len(json_files)}")
+    logger.info("%s", "=" * 60)
+    logger.info("✓ Import complete!")
+    logger.info("  Documents imported: %s/%s", successful_imports, len(json_files))
 
 
 def print_sample_queries():
     """Print some useful SQL query examples."""
-    print("\n" + "=" * 60)
-    print("USEFUL QUERIES:")
-    print("=" * 60)
-    print("""
+    logger.info("%s", "=" * 60)
+    logger.info("USEFUL QUERIES:")
+    logger.info("%s", "=" * 60)
+    logger.info("%s", """
         -- Get all data for a specific document:
         SELECT * FROM assessment_results WHERE document_id = '0a65f6b3176b4f43888238c21148c680';
 
@@ -279,16 +286,17 @@ def print_sample_queries():
 
 def main():
     """Main execution function."""
-    print("Analytics JSON to PostgreSQL Importer")
-    print("=" * 60)
+    setup_logging()
+    logger.info("Analytics JSON to PostgreSQL Importer")
+    logger.info("%s", "=" * 60)
     
     conn = None
     try:
         # Connect to database
         conn = connect_to_database()
         
-        # Create table if not exists
-        create_table(conn)
+        # Verify the schema created by migrate.py
+        ensure_schema(conn)
         
         # Import all JSON files
         import_all_json_files(conn, JSON_FOLDER)
@@ -297,11 +305,11 @@ def main():
         print_sample_queries()
         
     except Exception as e:
-        print(f"\n✗ Fatal error: {e}")
+        logger.error("✗ Fatal error: %s", e)
     finally:
         if conn:
             conn.close()
-            print("\n✓ Database connection closed")
+            logger.info("✓ Database connection closed")
 
 
 if __name__ == "__main__":
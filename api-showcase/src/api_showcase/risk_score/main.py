@@ -1,38 +1,55 @@
 
 from decouple import config
 import asyncio
+import logging
+import multiprocessing
 import os
-import json
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from ..event_loop import run
+from ..logging_setup import setup_logging
+from ..rest_importer import close_session
 from ..rest_importer.auth import get_token
 
 from ..pull_exporter.list_documents import list_documents
 from ..pull_exporter.get_document_data import get_documents_by_ids
-from .calculate_risk_scores import analyze_document
-from .create_csv_report import create_csv_report
+from .process_document import process_document_file
 
+logger = logging.getLogger(__name__)
+
+
+def _worker_context():
+    """
+    Start workers without fork(): by the time the pool is created this process
+    runs the logging and executor threads, whose locks a forked child could
+    inherit held. forkserver is used where available, spawn elsewhere.
+    """
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
 
-# config
-org_id = config("ORGANIZATION_ID")
-scope = config("DEFAULT_SCOPE")
-email = config("EMAIL")
-password = config("PROD_PASSWORD")
-auth_url = config("PROD_AUTH_URL")
 
 async def main():
+    # config; read here rather than at import, since worker processes
+    # re-import this module
+    org_id = config("ORGANIZATION_ID")
+    scope = config("DEFAULT_SCOPE")
+    email = config("EMAIL")
+    password = config("PROD_PASSWORD")
+    auth_url = config("PROD_AUTH_URL")
+    
     try:
         # Step 1: Get token
-        print("Step 1: Authenticating...")
+        logger.info("Step 1: Authenticating...")
         token = await get_token(email=email, password=password, org_id=org_id, auth_url=auth_url)
-        print("✓ Authentication successful")
+        logger.info("✓ Authentication successful")
         
         # Step 2: Get available documents
-        print("\nStep 2: Fetching available documents...")
+        logger.info("Step 2: Fetching available documents...")
         documents = await list_documents(access_token=token, scope=scope)
-        print(f"✓ Fetched {len(documents)} document(s)")
+        logger.info("✓ Fetched %s document(s)", len(documents))
         
         if not documents:
-            print("No documents found. Exiting.")
+            logger.info("No documents found. Exiting.")
             return
         
         # Extract document IDs from the documents list
@@ -48,18 +65,18 @@ async def main():
                 document_ids.append(doc)
         
         if not document_ids:
-            print("No valid document IDs found. Exiting.")
+            logger.info("No valid document IDs found. Exiting.")
             return
             
-        print(f"Extracted {len(document_ids)} document ID(s)")
+        logger.info("Extracted %s document ID(s)", len(document_ids))
         
         # Step 3: Get document data for all documents
-        print("\nStep 3: Fetching document data for all documents...")
+        logger.info("Step 3: Fetching document data for all documents...")
         output_directory = "/Users/daniellanghann/src/api-showcase/api-showcase/document_data"
         
         # Create output directory if it doesn't exist
         os.makedirs(output_directory, exist_ok=True)
-        print(f"✓ Output directory ready: {output_directory}")
+        logger.info("✓ Output directory ready: %s", output_directory)
         
         # Fetch all documents concurrently
         from ..pull_exporter.get_document_data import get_documents_by_ids
@@ -76,129 +93,109 @@ async def main():
         )
         
         # Print final summary
-        print("\n" + "="*50)
-        print("FINAL SUMMARY")
-        print("="*50)
-        successful = [doc_id for doc_id, data in results.items() if data.get("status") == "success"]
-        failed = [doc_id for doc_id, data in results.items() if data.get("status") == "error"]
-        
-        print(f"Total documents processed: {len(document_ids)}")
-        print(f"✓ Successful: {len(successful)}")
+        logger.info("%s", "="*50)
+        logger.info("FINAL SUMMARY")
+        logger.info("%s", "="*50)
+        # Count in one pass, keeping only the first few failed IDs to show
+        successful = 0
+        failed = 0
+        failed_sample = []
+        for doc_id, data in results.items():
+            status = data.get("status")
+            if status == "success":
+                successful += 1
+            elif status == "error":
+                failed += 1
+                if len(failed_sample) < 5:
+                    failed_sample.append(doc_id)
+        
+        logger.info("Total documents processed: %s", len(document_ids))
+        logger.info("✓ Successful: %s", successful)
         if failed:
-            print(f"✗ Failed: {len(failed)}")
-            print(f"  Failed IDs: {', '.join(failed[:5])}{'...' if len(failed) > 5 else ''}")
+            logger.error("✗ Failed: %s", failed)
+            logger.info("  Failed IDs: %s%s", ', '.join(failed_sample), '...' if failed > 5 else '')
         
-        print(f"\nAll document data saved to: {output_directory}")
+        logger.info("All document data saved to: %s", output_directory)
         
-        # Step 4: Generate analytics for all documents
-        print("\n" + "="*50)
-        print("Step 4: Generating analytics for all documents...")
-        print("="*50)
+        # Step 4/5: Generate analytics and CSV reports for all documents
+        logger.info("%s", "="*50)
+        logger.info("Step 4/5: Generating analytics and CSV reports for all documents...")
+        logger.info("%s", "="*50)
         
         results_directory = "/Users/daniellanghann/src/api-showcase/api-showcase/results"
         os.makedirs(results_directory, exist_ok=True)
-        print(f"✓ Results directory ready: {results_directory}")
+        logger.info("✓ Results directory ready: %s", results_directory)
         
-        # Get all JSON files from the document_data directory
-        json_files = [f for f in os.listdir(output_directory) if f.endswith('.json')]
-        print(f"Found {len(json_files)} document data file(s) to analyze")
+        csv_reports_directory = "/Users/daniellanghann/src/api-showcase/api-showcase/csv_reports"
+        os.makedirs(csv_reports_directory, exist_ok=True)
+        logger.info("✓ CSV reports directory ready: %s", csv_reports_directory)
+        
+        # Get all JSON files from the document_data directory; scandir knows
+        # each entry's type and full path without extra stat/join calls.
+        # Hidden files (e.g. caches) are not documents.
+        with os.scandir(output_directory) as entries:
+            json_files = [
+                entry.path for entry in entries
+                if entry.is_file() and entry.name.endswith('.json') and not entry.name.startswith('.')
+            ]
+        logger.info("Found %s document data file(s) to analyze", len(json_files))
+        
+        # One timestamp for the whole run keeps the output names consistent
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        
+        # Documents are independent and CPU-bound to process, so they are
+        # spread over worker processes; their messages are logged here
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=_worker_context()) as executor:
+            outcomes = await asyncio.gather(*(
+                loop.run_in_executor(
+                    executor,
+                    process_document_file,
+                    json_file,
+                    results_directory,
+                    csv_reports_directory,
+                    timestamp
+                )
+                for json_file in json_files
+            ))
         
         analytics_success = 0
-        analytics_failed = 0
-        
-        for json_file in json_files:
-            try:
-                file_path = os.path.join(output_directory, json_file)
-                
-                # Load document data
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    document_data = json.load(f)
-                
-                # Run analytics
-                analytics_result = analyze_document(data=document_data)
-                
-                # Extract document ID for filename
-                doc_id = analytics_result.get('document_id', 'unknown')
-                
-                # Create output filename with timestamp
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                output_filename = f"analytics_{doc_id}_{timestamp}.json"
-                output_path = os.path.join(results_directory, output_filename)
-                
-                # Save analytics result
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    json.dump(analytics_result, f, indent=2, ensure_ascii=False)
-                
-                print(f"✓ Analytics saved: {output_filename}")
-                analytics_success += 1
-                
-            except Exception as e:
-                print(f"✗ Failed to analyze {json_file}: {e}")
-                analytics_failed += 1
+        csv_success = 0
+        for analytics_ok, csv_ok, messages in outcomes:
+            analytics_success += analytics_ok
+            csv_success += csv_ok
+            for level, message in messages:
+                logger.log(level, "%s", message)
+        analytics_failed = len(outcomes) - analytics_success
+        csv_failed = len(outcomes) - csv_success
         
         # Final analytics summary
-        print("\n" + "="*50)
-        print("ANALYTICS SUMMARY")
-        print("="*50)
-        print(f"Documents analyzed: {len(json_files)}")
-        print(f"✓ Successful: {analytics_success}")
+        logger.info("%s", "="*50)
+        logger.info("ANALYTICS SUMMARY")
+        logger.info("%s", "="*50)
+        logger.info("Documents analyzed: %s", len(json_files))
+        logger.info("✓ Successful: %s", analytics_success)
         if analytics_failed > 0:
-            print(f"✗ Failed: {analytics_failed}")
-        print(f"\nAll analytics saved to: {results_directory}")
-        
-        # Step 5: Generate CSV reports for all documents
-        print("\n" + "="*50)
-        print("Step 5: Generating CSV reports for all documents...")
-        print("="*50)
-        
-        csv_reports_directory = "/Users/daniellanghann/src/api-showcase/api-showcase/csv_reports"
-        os.makedirs(csv_reports_directory, exist_ok=True)
-        print(f"✓ CSV reports directory ready: {csv_reports_directory}")
-        
-        csv_success = 0
-        csv_failed = 0
-        
-        # Re-scan the document_data directory for CSV generation
-        for json_file in json_files:
-            try:
-                file_path = os.path.join(output_directory, json_file)
-                
-                # Load document data
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    document_data = json.load(f)
-                
-                # Extract document ID for filename
-                doc_id = document_data.get('document', {}).get('document_id', 'unknown')
-                
-                # Create CSV filename with timestamp
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                csv_filename = f"report_{doc_id}_{timestamp}.csv"
-                csv_output_path = os.path.join(csv_reports_directory, csv_filename)
-                
-                # Generate CSV report
-                create_csv_report(data=document_data, output_filename=csv_output_path)
-                
-                print(f"✓ CSV report saved: {csv_filename}")
-                csv_success += 1
-                
-            except Exception as e:
-                print(f"✗ Failed to create CSV for {json_file}: {e}")
-                csv_failed += 1
+            logger.error("✗ Failed: %s", analytics_failed)
+        logger.info("All analytics saved to: %s", results_directory)
         
         # Final CSV summary
-        print("\n" + "="*50)
-        print("CSV REPORTS SUMMARY")
-        print("="*50)
-        print(f"CSV reports generated: {len(json_files)}")
-        print(f"✓ Successful: {csv_success}")
+        logger.info("%s", "="*50)
+        logger.info("CSV REPORTS SUMMARY")
+        logger.info("%s", "="*50)
+        logger.info("CSV reports generated: %s", len(json_files))
+        logger.info("✓ Successful: %s", csv_success)
         if csv_failed > 0:
-            print(f"✗ Failed: {csv_failed}")
-        print(f"\nAll CSV reports saved to: {csv_reports_directory}")
+            logger.error("✗ Failed: %s", csv_failed)
+        logger.info("All CSV reports saved to: %s", csv_reports_directory)
         
     except Exception as e:
-        print(f"\n✗ Error in main execution: {e}")
+        logger.error("✗ Error in main execution: %s", e)
         raise
+    finally:
+        await close_session()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    setup_logging()
+    run(main())
\ No newline at end of file
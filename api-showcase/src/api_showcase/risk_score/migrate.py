@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Risk Score Schema Migration
+Creates the questions and assessment_results tables and their indexes.
+Run once before the importers; it is idempotent and safe to re-run:
+    python -m api_showcase.risk_score.migrate
+"""
+
+import logging
+import psycopg2
+
+from ..logging_setup import setup_logging
+from .import_results import connect_to_database
+
+logger = logging.getLogger(__name__)
+
+
+# Table creation SQL
+CREATE_QUESTIONS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS questions (
+    id SERIAL PRIMARY KEY,
+    document_id VARCHAR(255) NOT NULL UNIQUE,
+    filename VARCHAR(500),
+    questions_data JSONB NOT NULL,
+    total_questions INTEGER,
+    total_potential_risk_points INTEGER,
+    total_actual_risk_points INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+CREATE_ASSESSMENT_RESULTS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS assessment_results (
+    id SERIAL PRIMARY KEY,
+    document_id VARCHAR(255) NOT NULL UNIQUE,
+    filename VARCHAR(500),
+    assessment VARCHAR(100),
+    number_of_questions INTEGER,
+    number_of_ko_questions INTEGER,
+    number_of_plausible_checks INTEGER,
+    number_of_questions_answered_no INTEGER,
+    number_of_ko_questions_answered_no INTEGER,
+    number_of_plausible_checks_answered_no INTEGER,
+    is_plausible BOOLEAN,
+    max_total_risk_points INTEGER,
+    total_risk_score INTEGER,
+    risk_ratio DECIMAL(10, 4),
+    categories JSONB NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+# GIN index on questions_data; import_csv_reports rebuilds it around large loads
+QUESTIONS_DATA_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_questions_data ON questions USING GIN (questions_data);
+"""
+
+# Create indexes for better performance
+CREATE_INDEXES_SQL = QUESTIONS_DATA_INDEX_SQL + """
+CREATE INDEX IF NOT EXISTS idx_questions_document_id ON questions(document_id);
+CREATE INDEX IF NOT EXISTS idx_assessment_document_id ON assessment_results(document_id);
+CREATE INDEX IF NOT EXISTS idx_assessment_categories ON assessment_results USING GIN (categories);
+CREATE INDEX IF NOT EXISTS idx_assessment_risk_ratio ON assessment_results(risk_ratio);
+CREATE INDEX IF NOT EXISTS idx_assessment_is_plausible ON assessment_results(is_plausible);
+"""
+
+
+def migrate(conn):
+    """Create the risk score tables and indexes if they don't exist."""
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(CREATE_QUESTIONS_TABLE_SQL)
+            cursor.execute(CREATE_ASSESSMENT_RESULTS_TABLE_SQL)
+            cursor.execute(CREATE_INDEXES_SQL)
+        conn.commit()
+        logger.info("✓ Tables 'questions' and 'assessment_results' created/verified successfully")
+    except psycopg2.Error as e:
+        logger.error("✗ Error creating tables: %s", e)
+        conn.rollback()
+        raise
+
+
+def main():
+    """Main execution function."""
+    setup_logging()
+    logger.info("Risk Score Schema Migration")
+    logger.info("%s", "=" * 60)
+    
+    conn = None
+    try:
+        conn = connect_to_database()
+        migrate(conn)
+    except Exception as e:
+        logger.error("✗ Fatal error: %s", e)
+    finally:
+        if conn:
+            conn.close()
+            logger.info("✓ Database connection closed")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,3 +12,14 @@ class RiskMetrics:
     is_plausible: bool
 
 
+
+
+@dataclass(slots=True)
+class Question:
+    """A question node parsed from the document tree"""
+    identifier: str
+    question_text: str
+    points: int
+    is_ko: bool
+    is_plausible: bool
+    yes_no_value: bool
@@ -0,0 +1,73 @@
+import logging
+import os
+
+import orjson
+
+from .calculate_risk_scores import analyze_document, collect_questions_by_category
+from .create_csv_report import create_csv_report
+
+
+def process_document_file(file_path: str, results_directory: str, csv_reports_directory: str, timestamp: str) -> tuple:
+    """
+    Write the analytics JSON and the CSV report for one document data file.
+    Loads the file and walks its question tree once for both outputs; runs in
+    a worker process. `timestamp` is the run's timestamp used in both file names.
+    Messages are returned instead of printed, so the parent logs them without
+    output from several workers interleaving.
+
+    Returns:
+        (analytics_ok, csv_ok, messages) with messages as (level, text) pairs
+    """
+    json_file = os.path.basename(file_path)
+    messages = []
+    try:
+        # Load document data
+        with open(file_path, 'rb') as f:
+            document_data = orjson.loads(f.read())
+
+        questions_by_category = collect_questions_by_category(document_data)
+    except Exception as e:
+        messages.append((logging.ERROR, f"✗ Failed to load {json_file}: {e}"))
+        return False, False, messages
+
+    analytics_ok = False
+    try:
+        # Run analytics
+        analytics_result = analyze_document(data=document_data, questions_by_category=questions_by_category)
+
+        # Extract document ID for filename
+        doc_id = analytics_result.get('document_id', 'unknown')
+
+        # Create output filename with timestamp
+        output_filename = f"analytics_{doc_id}_{timestamp}.json"
+        output_path = os.path.join(results_directory, output_filename)
+
+        # Save analytics result
+        with open(output_path, 'wb') as f:
+            f.write(orjson.dumps(analytics_result, option=orjson.OPT_INDENT_2))
+
+        messages.append((logging.INFO, f"✓ Analytics saved: {output_filename}"))
+        analytics_ok = True
+
+    except Exception as e:
+        messages.append((logging.ERROR, f"✗ Failed to analyze {json_file}: {e}"))
+
+    csv_ok = False
+    try:
+        # Extract document ID for filename
+        doc_id = document_data.get('document', {}).get('document_id', 'unknown')
+
+        # Create CSV filename with timestamp
+        csv_filename = f"report_{doc_id}_{timestamp}.csv"
+        csv_output_path = os.path.join(csv_reports_directory, csv_filename)
+
+        # Generate CSV report
+        create_csv_report(data=document_data, output_filename=csv_output_path, questions_by_category=questions_by_category)
+
+        messages.append((logging.INFO, f"✓ CSV report saved: {csv_filename}"))
+        csv_ok = True
+
+    except Exception as e:
+        messages.append((logging.ERROR, f"✗ Failed to create CSV for {json_file}: {e}"))
+
+    return analytics_ok, csv_ok, messages
@@ -1,6 +1,61 @@
+import asyncio
 import os
 from pathlib import Path
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _scan_dir(folder_path, label):
+    """
+    Return the names of the regular files in a folder, or None if it doesn't exist.
+    scandir entries carry their type, so there is no stat per file, and
+    opening the folder doubles as the existence check. Symlinks are not
+    followed and are skipped.
+    """
+    try:
+        with os.scandir(folder_path) as entries:
+            return {entry.name for entry in entries if entry.is_file(follow_symlinks=False)}
+    except FileNotFoundError:
+        print(f"Warning: {label} folder '{folder_path}' does not exist")
+        return None
+
+
+def _discard_found(folder_path, remaining):
+    """
+    Remove the names of the regular files (not symlinks) in an output folder
+    from `remaining`.
+    Returns early once `remaining` is empty; set.discard is atomic, so several
+    folders can be scanned against the same set at once.
+    """
+    if not remaining:
+        return
+    try:
+        with os.scandir(folder_path) as entries:
+            for entry in entries:
+                if entry.name in remaining and entry.is_file(follow_symlinks=False):
+                    remaining.discard(entry.name)
+                    if not remaining:
+                        return
+    except FileNotFoundError:
+        print(f"Warning: Output folder '{folder_path}' does not exist")
+
+
+def _report_missing(missing_files, output_txt_path):
+    """Print the missing filenames and write them to `output_txt_path` if given."""
+    # Print results
+    print(f"Files in input folder but not in any output folder:")
+    print(missing_files)
+    
+    # Write to text file if path provided
+    if output_txt_path:
+        try:
+            # One write for the whole list, one name per line
+            with open(output_txt_path, 'w') as f:
+                f.write("".join(f"{filename}\n" for filename in missing_files))
+            print(f"\nMissing files written to: {output_txt_path}")
+        except Exception as e:
+            print(f"Error writing to file: {e}")
+
 
 def find_missing_files(input_folder_path, output_folder_paths, output_txt_path=None):
     """
@@ -15,41 +70,42 @@ def find_missing_files(input_folder_path, output_folder_paths, output_txt_path=N
         List of filenames that exist in input folder but not in any output folder
     """
     # Get all filenames from input folder
-    input_files = set()
-    if os.path.exists(input_folder_path):
-        input_files = {f for f in os.listdir(input_folder_path) 
-                      if os.path.isfile(os.path.join(input_folder_path, f))}
-    else:
-        print(f"Warning: Input folder '{input_folder_path}' does not exist")
+    input_files = _scan_dir(input_folder_path, "Input")
+    if input_files is None:
         return []
     
-    # Get all filenames from all output folders
-    output_files = set()
-    for output_path in output_folder_paths:
-        if os.path.exists(output_path):
-            files = {f for f in os.listdir(output_path) 
-                    if os.path.isfile(os.path.join(output_path, f))}
-            output_files.update(files)
-        else:
-            print(f"Warning: Output folder '{output_path}' does not exist")
-    
-    # Find files in input that are not in any output folder
-    missing_files = sorted(list(input_files - output_files))
+    # Strike every name found in an output folder from the candidates;
+    # listing is IO-bound and scandir releases the GIL, so the folders are
+    # scanned concurrently, and scans stop once nothing is left to find
+    remaining = input_files
+    output_folder_paths = list(output_folder_paths)
+    if output_folder_paths:
+        with ThreadPoolExecutor(max_workers=min(8, len(output_folder_paths))) as executor:
+            list(executor.map(lambda path: _discard_found(path, remaining), output_folder_paths))
     
-    # Print results
-    print(f"Files in input folder but not in any output folder:")
-    print(missing_files)
+    # Whatever is left is in the input folder but not in any output folder
+    missing_files = sorted(remaining)
+    _report_missing(missing_files, output_txt_path)
+    return missing_files
+
+
+async def find_missing_files_async(input_folder_path, output_folder_paths, output_txt_path=None):
+    """
+    Async variant of find_missing_files for callers already on an event loop.
+    Each folder is scanned in asyncio.to_thread and the output folders are
+    gathered concurrently; the result is the same as find_missing_files.
+    """
+    input_files = await asyncio.to_thread(_scan_dir, input_folder_path, "Input")
+    if input_files is None:
+        return []
     
-    # Write to text file if path provided
-    if output_txt_path:
-        try:
-            with open(output_txt_path, 'w') as f:
-                for filename in missing_files:
-                    f.write(f"{filename}\n")
-            print(f"\nMissing files written to: {output_txt_path}")
-        except Exception as e:
-            print(f"Error writing to file: {e}")
+    remaining = input_files
+    await asyncio.gather(*(
+        asyncio.to_thread(_discard_found, path, remaining) for path in output_folder_paths
+    ))
     
+    missing_files = sorted(remaining)
+    await asyncio.to_thread(_report_missing, missing_files, output_txt_path)
     return missing_files
 
 # Example usage
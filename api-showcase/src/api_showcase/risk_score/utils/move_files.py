@@ -1,12 +1,172 @@
+import asyncio
+import errno
+import logging
 import os
 import shutil
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from itertools import islice
 
-def move_files_from_list(txt_file_path, source_folder, destination_folder):
+from ...logging_setup import setup_logging
+from .get_missing_contracts import find_missing_files
+
+logger = logging.getLogger(__name__)
+
+# Threads moving files in parallel
+MOVE_WORKERS = 16
+
+# Moves queued ahead of the reporting loop; bounds memory for long lists
+MAX_PENDING_MOVES = MOVE_WORKERS * 4
+
+# Log a progress line every this many files
+PROGRESS_EVERY = 100
+
+# Moves in flight at once in move_files_from_list_async
+ASYNC_MOVE_CONCURRENCY = 64
+
+# Outcome of a name listed again after it was already submitted
+_DUPLICATE = object()
+
+
+def _move_no_overwrite(source_path, destination_path, same_device):
+    """
+    Move a file without replacing an existing destination.
+    Raises FileNotFoundError if the source is missing and FileExistsError if
+    the destination already exists.
+    """
+    if same_device:
+        try:
+            # Unlike rename(), link() refuses to replace an existing file
+            os.link(source_path, destination_path)
+        except (FileNotFoundError, FileExistsError):
+            raise
+        except OSError:
+            # Filesystem without hard links; fall through to a checked move
+            pass
+        else:
+            os.unlink(source_path)
+            return
+    if os.path.lexists(destination_path):
+        raise FileExistsError(errno.EEXIST, "File exists", destination_path)
+    # Across devices this copies with shutil's zero-copy fast path, then unlinks
+    shutil.move(source_path, destination_path)
+
+
+def _move_one(source_prefix, destination_prefix, filename, same_device):
+    """
+    Move one file for the thread pool; returns the exception it raised, or None.
+    The prefixes are the folder paths with a trailing separator.
+    """
+    try:
+        _move_no_overwrite(source_prefix + filename, destination_prefix + filename, same_device)
+    except Exception as e:
+        return e
+    return None
+
+
+def _iter_filenames(lines):
+    """Yield the non-empty, stripped names of a filename list or text file."""
+    for line in lines:
+        name = line.strip()
+        if name:
+            yield name
+
+
+def _prepare_move(filenames_or_path, source_folder, destination_folder):
+    """
+    Check the inputs, create the destination folder and open the list.
+    Returns (listing, existing, same_device, source_prefix, destination_prefix),
+    where `listing` is a context manager yielding the lines or names, or None
+    if the move cannot start.
     """
-    Read filenames from a text file and move those files from source to destination folder.
+    is_path = isinstance(filenames_or_path, (str, os.PathLike))
+    
+    # Check if text file exists
+    if is_path and not os.path.exists(filenames_or_path):
+        logger.error("Error: Text file '%s' does not exist", filenames_or_path)
+        return None
+    
+    # Check if source folder exists
+    if not os.path.exists(source_folder):
+        logger.error("Error: Source folder '%s' does not exist", source_folder)
+        return None
+    
+    # Create destination folder if it doesn't exist; makedirs reports an
+    # existing folder itself, so no separate exists() check is needed
+    try:
+        os.makedirs(destination_folder)
+        logger.info("Created destination folder: %s", destination_folder)
+    except FileExistsError:
+        pass
+    
+    # Open the text file; filenames are read lazily while moving. A list of
+    # names passed in directly is used as is.
+    if is_path:
+        try:
+            listing = open(filenames_or_path, 'r')
+        except Exception as e:
+            logger.error("Error reading text file: %s", e)
+            return None
+        logger.info("Moving files listed in %s...", filenames_or_path)
+    else:
+        listing = nullcontext(filenames_or_path)
+        logger.info("Moving listed files...")
+    
+    # Names already in the destination, listed once instead of probed per file
+    with os.scandir(destination_folder) as entries:
+        existing = {entry.name for entry in entries}
+    
+    # Within one filesystem a move is a link() plus unlink(); shutil.move is
+    # only needed to copy across devices
+    same_device = os.stat(source_folder).st_dev == os.stat(destination_folder).st_dev
+    
+    # Joined once; each path is then a plain concatenation
+    source_prefix = os.path.join(source_folder, "")
+    destination_prefix = os.path.join(destination_folder, "")
+    
+    return listing, existing, same_device, source_prefix, destination_prefix
+
+
+def _report_outcome(filename, error, moved_files, failed_files):
+    """Log the outcome of one listed file and record it as moved or failed."""
+    if error is None:
+        logger.debug("✓ Moved: %s", filename)
+        moved_files.append(filename)
+        return
+    failed_files.append(filename)
+    if error is _DUPLICATE:
+        logger.warning("⚠ Listed more than once: %s", filename)
+    elif isinstance(error, FileNotFoundError):
+        logger.warning("⚠ File not found: %s", filename)
+    elif isinstance(error, FileExistsError):
+        logger.warning("⚠ File already exists in destination: %s", filename)
+    else:
+        logger.error("✗ Failed to move %s: %s", filename, error)
+
+
+def _report_progress(moved_files, failed_files):
+    done = len(moved_files) + len(failed_files)
+    if done % PROGRESS_EVERY == 0:
+        logger.info("Processed %s files", done)
+
+
+def _log_summary(total_files, moved_files, failed_files):
+    logger.info("%s", '='*50)
+    logger.info("Summary:")
+    logger.info("  Files listed: %s", total_files)
+    logger.info("  Successfully moved: %s files", len(moved_files))
+    logger.info("  Failed: %s files", len(failed_files))
+    logger.info("%s", '='*50)
+
+
+def move_files_from_list(filenames_or_path, source_folder, destination_folder):
+    """
+    Move the listed files from source to destination folder.
     
     Args:
-        txt_file_path: Path to the text file containing filenames (one per line)
+        filenames_or_path: Path to a text file containing filenames (one per line),
+            or an iterable of filenames such as the list find_missing_files returns
         source_folder: Folder where the files currently are
         destination_folder: Folder where files should be moved to
     
@@ -16,76 +176,129 @@ def move_files_from_list(txt_file_path, source_folder, destination_folder):
     moved_files = []
     failed_files = []
     
-    # Check if text file exists
-    if not os.path.exists(txt_file_path):
-        print(f"Error: Text file '{txt_file_path}' does not exist")
+    prepared = _prepare_move(filenames_or_path, source_folder, destination_folder)
+    if prepared is None:
         return moved_files, failed_files
+    listing, existing, same_device, source_prefix, destination_prefix = prepared
     
-    # Check if source folder exists
-    if not os.path.exists(source_folder):
-        print(f"Error: Source folder '{source_folder}' does not exist")
-        return moved_files, failed_files
+    # Move the files on a thread pool; rename/link calls release the GIL, so
+    # their latency overlaps. Outcomes are reported here, in list order, as
+    # soon as more than MAX_PENDING_MOVES are queued, so the list is never
+    # held in memory as a whole.
+    total_files = 0
+    submitted = set()
+    outcomes = deque()
     
-    # Create destination folder if it doesn't exist
-    if not os.path.exists(destination_folder):
-        os.makedirs(destination_folder)
-        print(f"Created destination folder: {destination_folder}")
+    def report_until(pending):
+        while len(outcomes) > pending:
+            filename, outcome = outcomes.popleft()
+            error = outcome.result() if isinstance(outcome, Future) else outcome
+            _report_outcome(filename, error, moved_files, failed_files)
+            _report_progress(moved_files, failed_files)
     
-    # Read filenames from text file
-    try:
-        with open(txt_file_path, 'r') as f:
-            filenames = [line.strip() for line in f if line.strip()]
-    except Exception as e:
-        print(f"Error reading text file: {e}")
+    with listing as lines, ThreadPoolExecutor(max_workers=MOVE_WORKERS) as executor:
+        # Bound once; the loop runs once per listed file
+        submit = executor.submit
+        add_submitted = submitted.add
+        add_outcome = outcomes.append
+        for filename in _iter_filenames(lines):
+            total_files += 1
+            if filename in submitted:
+                add_outcome((filename, _DUPLICATE))
+            elif filename in existing:
+                add_outcome((filename, FileExistsError()))
+            else:
+                add_submitted(filename)
+                add_outcome((filename, submit(
+                    _move_one, source_prefix, destination_prefix, filename, same_device
+                )))
+            if len(outcomes) > MAX_PENDING_MOVES:
+                report_until(MAX_PENDING_MOVES)
+        
+        report_until(0)
+    
+    _log_summary(total_files, moved_files, failed_files)
+    
+    return moved_files, failed_files
+
+
+async def move_files_from_list_async(filenames_or_path, source_folder, destination_folder,
+                                     max_concurrent=ASYNC_MOVE_CONCURRENCY):
+    """
+    Async variant of move_files_from_list for callers already on an event loop.
+    Each move runs in asyncio.to_thread, with at most `max_concurrent` in flight;
+    outcomes are reported in list order and the return value is the same.
+    """
+    moved_files = []
+    failed_files = []
+    
+    prepared = await asyncio.to_thread(_prepare_move, filenames_or_path, source_folder, destination_folder)
+    if prepared is None:
         return moved_files, failed_files
+    listing, existing, same_device, source_prefix, destination_prefix = prepared
     
-    print(f"\nAttempting to move {len(filenames)} files...\n")
+    semaphore = asyncio.Semaphore(max_concurrent)
     
-    # Move each file
-    for filename in filenames:
-        source_path = os.path.join(source_folder, filename)
-        destination_path = os.path.join(destination_folder, filename)
-        
-        # Check if file exists in source folder
-        if not os.path.exists(source_path):
-            print(f"⚠ File not found: {filename}")
-            failed_files.append(filename)
-            continue
-        
-        # Check if file already exists in destination
-        if os.path.exists(destination_path):
-            print(f"⚠ File already exists in destination: {filename}")
-            failed_files.append(filename)
-            continue
-        
-        # Move the file
-        try:
-            shutil.move(source_path, destination_path)
-            print(f"✓ Moved: {filename}")
-            moved_files.append(filename)
-        except Exception as e:
-            print(f"✗ Failed to move {filename}: {e}")
-            failed_files.append(filename)
+    async def move_with_semaphore(filename):
+        async with semaphore:
+            return await asyncio.to_thread(
+                _move_one, source_prefix, destination_prefix, filename, same_device
+            )
+    
+    # Names are read and tasks created only a few rounds of moves ahead of
+    # the reporting, so neither the list nor the tasks are held as a whole
+    max_pending = max_concurrent * 4
+    total_files = 0
+    submitted = set()
+    outcomes = deque()
+    
+    async def report_until(pending):
+        while len(outcomes) > pending:
+            filename, outcome = outcomes.popleft()
+            error = await outcome if isinstance(outcome, asyncio.Future) else outcome
+            _report_outcome(filename, error, moved_files, failed_files)
+            _report_progress(moved_files, failed_files)
     
-    # Summary
-    print(f"\n{'='*50}")
-    print(f"Summary:")
-    print(f"  Successfully moved: {len(moved_files)} files")
-    print(f"  Failed: {len(failed_files)} files")
-    print(f"{'='*50}")
+    with listing as lines:
+        names = _iter_filenames(lines)
+        # Reading the list is blocking IO, so each chunk is read in a thread
+        while chunk := await asyncio.to_thread(lambda: list(islice(names, max_pending))):
+            total_files += len(chunk)
+            for filename in chunk:
+                if filename in submitted:
+                    outcomes.append((filename, _DUPLICATE))
+                elif filename in existing:
+                    outcomes.append((filename, FileExistsError()))
+                else:
+                    submitted.add(filename)
+                    outcomes.append((filename, asyncio.ensure_future(move_with_semaphore(filename))))
+                if len(outcomes) > max_pending:
+                    await report_until(max_pending)
+    
+    await report_until(0)
+    
+    _log_summary(total_files, moved_files, failed_files)
     
     return moved_files, failed_files
 
 
 # Example usage
 if __name__ == "__main__":
+    setup_logging()
+    
     # Example paths
+    test_documents = "/Users/daniellanghann/src/api-showcase/api-showcase/src/api_showcase/rest_importer/test_documents"
+    source = f"{test_documents}/ALL"
+    destination = f"{test_documents}/0_MISSING"
+    output_folders = [f"{test_documents}/1_IMD", f"{test_documents}/2_IDD", f"{test_documents}/3_ESG"]
+    
+    # The missing names are passed on directly; the text file is only kept
+    # as a record of what was moved
     txt_file = "/Users/daniellanghann/src/api-showcase/api-showcase/missing_files.txt"
-    source = "/Users/daniellanghann/src/api-showcase/api-showcase/src/api_showcase/rest_importer/test_documents/ALL"
-    destination = "/Users/daniellanghann/src/api-showcase/api-showcase/src/api_showcase/rest_importer/test_documents/0_MISSING"
+    missing = find_missing_files(source, output_folders, txt_file)
     
-    moved, failed = move_files_from_list(txt_file, source, destination)
+    moved, failed = move_files_from_list(missing, source, destination)
     
     # You can also save the results
     if moved:
-        print(f"\nMoved files: {moved}")
\ No newline at end of file
+        logger.info("Moved files: %s", moved)